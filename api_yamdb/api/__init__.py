@@ -3,9 +3,12 @@
 
 Содержит модули:
 apps        -- Конфиги приложения api.
+cache       -- Версионный кэш ответов приложения api.
 filters     -- Фильтры приложения api.
+pagination  -- Пагинация приложения api.
 permissions -- Разрешения приложения api.
 serializers -- Сериализаторы приложения api.
+signals     -- Сигналы приложения api.
 urls        -- URL-ы приложения api.
 views       -- Вьюшки приложения api.
 """
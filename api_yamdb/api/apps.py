@@ -12,3 +12,7 @@ class ApiConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        """Подключает сигналы приложения."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,96 @@
+"""
+Асинхронный режим чтения каталога.
+
+В Django 3.2 нет асинхронного ORM, а синхронные вьюшки под ASGI
+выполняются по очереди в одном потоке. С API_ASYNC_CATALOG
+вьюшки каталога становятся корутинами: GET и HEAD выполняются
+в ограниченном пуле из API_ASYNC_THREADS потоков, так что медленный
+запрос к базе занимает поток пула, а не весь воркер. У каждого
+потока пула своё подключение к базе, оно закрывается
+по CONN_MAX_AGE. Запись идёт прежним путём.
+
+run_in_pool  -- Выполняет функцию в пуле потоков каталога.
+pooled_view  -- Превращает синхронную вьюшку в асинхронную.
+pooled_urls  -- Заменяет вьюшки указанных классов на асинхронные.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+POOLED_METHODS = ('GET', 'HEAD')
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Создаёт пул при первом запросе, уже в процессе воркера."""
+    with _executor_lock:
+        if 'catalog' not in _executors:
+            _executors['catalog'] = ThreadPoolExecutor(
+                max_workers=settings.API_ASYNC_THREADS,
+                thread_name_prefix='catalog'
+            )
+    return _executors['catalog']
+
+
+def _call(function, *args, **kwargs):
+    close_old_connections()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(function, *args, **kwargs):
+    """Выполняет функцию в пуле потоков каталога."""
+    loop = asyncio.get_running_loop()
+    # Контекст запроса (например, выбор реплики базы) переносится в поток.
+    return await loop.run_in_executor(
+        _get_executor(), copy_context().run,
+        partial(_call, function, *args, **kwargs)
+    )
+
+
+def _render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if callable(getattr(response, 'render', None)):
+        response.render()
+    return response
+
+
+def pooled_view(view):
+    """
+    Превращает синхронную вьюшку в асинхронную.
+
+    Чтение выполняется и рендерится в пуле потоков каталога,
+    остальные методы -- как синхронные вьюшки под ASGI.
+    """
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method in POOLED_METHODS:
+            return await run_in_pool(_render, view, request, *args, **kwargs)
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+    return async_view
+
+
+def pooled_urls(patterns, view_classes):
+    """Заменяет вьюшки указанных классов на асинхронные."""
+    return [
+        URLPattern(
+            pattern.pattern, pooled_view(pattern.callback),
+            pattern.default_args, pattern.name
+        )
+        if getattr(pattern.callback, 'cls', None) in view_classes
+        else pattern
+        for pattern in patterns
+    ]
@@ -0,0 +1,197 @@
+"""
+Аутентификация по JWT с кэшем пользователей.
+
+Пользователь из токена ищется сначала в памяти процесса
+(API_USER_LOCAL_CACHE_TIMEOUT секунд), затем в общем кэше
+(API_USER_CACHE_TIMEOUT секунд) и только после этого в базе.
+Пароль в кэш не попадает: у пользователя из кэша это отложенное
+поле, и save() обновляет только остальные поля.
+
+Сохранение и удаление пользователя сбрасывает его кэш (сигналы
+приложения api). Память других процессов устаревает не дольше
+API_USER_LOCAL_CACHE_TIMEOUT.
+
+Токен с ролями (API_TOKEN_CLAIMS) несёт role, is_staff, is_superuser
+и версию токенов пользователя. Для него пользователь собирается
+из токена, а из кэша или базы читается только текущая версия:
+смена прав увеличивает её, и старые токены перестают приниматься.
+
+get_cached_user         -- Возвращает пользователя по id через кэш.
+get_token_version       -- Возвращает текущую версию токенов пользователя.
+forget_user             -- Сбрасывает кэш пользователя.
+access_token_for        -- Выдаёт access-токен пользователю.
+CachedJWTAuthentication -- JWTAuthentication с кэшем пользователей.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+
+from .cache import KEY_PREFIX, get_cache
+
+CACHED_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname != 'password'
+)
+TOKEN_CLAIMS = ('role', 'is_staff', 'is_superuser', 'token_version')
+# Поля пользователя из токена с ролями, в порядке полей модели.
+CLAIM_USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in ('id', 'is_active', *TOKEN_CLAIMS)
+)
+LOCAL_CACHE_SIZE = 10000
+
+_local_users = {}
+
+
+def _user_key(user_id):
+    return f'{KEY_PREFIX}:user:{user_id}'
+
+
+def _version_key(user_id):
+    return f'{KEY_PREFIX}:token-version:{user_id}'
+
+
+def _build_user(values, fields=CACHED_FIELDS):
+    """Собирает пользователя, поля не из fields остаются отложенными."""
+    return User.from_db(
+        router.db_for_read(User), fields, [values[name] for name in fields]
+    )
+
+
+def _remember_locally(user_id, values):
+    timeout = settings.API_USER_LOCAL_CACHE_TIMEOUT
+    if timeout <= 0:
+        return
+    if len(_local_users) >= LOCAL_CACHE_SIZE:
+        _local_users.clear()
+    _local_users[str(user_id)] = (time.monotonic() + timeout, values)
+
+
+def _cached_values(user_id):
+    """Возвращает поля пользователя из памяти процесса или общего кэша."""
+    entry = _local_users.get(str(user_id))
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    values = get_cache().get(_user_key(user_id))
+    if values is None:
+        return None
+    _remember_locally(user_id, values)
+    return values
+
+
+def get_cached_user(user_id):
+    """
+    Возвращает пользователя по id через кэш.
+
+    Возвращает None, если пользователя нет.
+    """
+    values = _cached_values(user_id)
+    if values is not None and set(CACHED_FIELDS) <= set(values):
+        return _build_user(values)
+    values = User.objects.filter(pk=user_id).values(*CACHED_FIELDS).first()
+    if values is None:
+        return None
+    get_cache().set(
+        _user_key(user_id), values, timeout=settings.API_USER_CACHE_TIMEOUT
+    )
+    _remember_locally(user_id, values)
+    return _build_user(values)
+
+
+def get_token_version(user_id):
+    """
+    Возвращает текущую версию токенов пользователя.
+
+    Для удалённого или неактивного пользователя возвращает None.
+    """
+    cache = get_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        row = User.objects.filter(pk=user_id).values_list(
+            'token_version', 'is_active'
+        ).first()
+        version = row[0] if row and row[1] else -1
+        cache.set(
+            _version_key(user_id), version,
+            timeout=settings.API_USER_CACHE_TIMEOUT
+        )
+    return None if version < 0 else version
+
+
+def forget_user(user_id):
+    """Сбрасывает кэш пользователя."""
+    _local_users.pop(str(user_id), None)
+    get_cache().delete_many([_user_key(user_id), _version_key(user_id)])
+
+
+def access_token_for(user):
+    """
+    Выдаёт access-токен пользователю.
+
+    С API_TOKEN_CLAIMS в токен добавляются права пользователя
+    и версия токенов.
+    """
+    token = AccessToken.for_user(user)
+    if settings.API_TOKEN_CLAIMS:
+        for claim in TOKEN_CLAIMS:
+            token[claim] = getattr(user, claim)
+    return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication с кэшем пользователей.
+
+    get_user        -- Возвращает пользователя из токена.
+    get_claims_user -- Собирает пользователя из токена с ролями.
+    """
+
+    def get_user(self, validated_token):
+        """Возвращает пользователя из токена."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        if 'token_version' in validated_token:
+            return self.get_claims_user(user_id, validated_token)
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return user
+
+    def get_claims_user(self, user_id, validated_token):
+        """
+        Собирает пользователя из токена с ролями.
+
+        Из кэша или базы читается только версия токенов. Остальные
+        поля пользователя отложены и загружаются при обращении.
+        """
+        version = get_token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if version != validated_token['token_version']:
+            raise InvalidToken(_('Token is invalid or expired'))
+        values = {
+            claim: validated_token.get(claim) for claim in TOKEN_CLAIMS
+        }
+        values.update(id=user_id, is_active=True)
+        return _build_user(values, CLAIM_USER_FIELDS)
@@ -0,0 +1,130 @@
+"""
+Версионный кэш ответов приложения api.
+
+Ключ ответа содержит версию модели, поэтому запись в модель
+делает устаревшими все её закэшированные ответы без перебора ключей.
+
+get_version     -- Возвращает текущую версию данных модели.
+bump_version    -- Увеличивает версию данных модели.
+record_lookup   -- Учитывает попадание или промах кэша.
+cache_stats     -- Возвращает счётчики попаданий и промахов по моделям.
+CachedListMixin -- Кэширует ответы list по версии модели и строке запроса.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from api_yamdb.db_routers import read_from_primary
+
+KEY_PREFIX = 'api-cache'
+HIT = 'hit'
+MISS = 'miss'
+
+
+def get_cache():
+    """Возвращает бэкенд кэша ответов."""
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _version_key(label):
+    return f'{KEY_PREFIX}:version:{label}'
+
+
+def _stats_key(label, outcome):
+    return f'{KEY_PREFIX}:stats:{label}:{outcome}'
+
+
+def _initial_version():
+    """Версия от времени не повторяет вытесненную из кэша версию."""
+    return int(time.time() * 1000)
+
+
+def get_version(label):
+    """Возвращает текущую версию данных модели."""
+    cache = get_cache()
+    key = _version_key(label)
+    cache.add(key, _initial_version(), timeout=None)
+    return cache.get(key) or _initial_version()
+
+
+def bump_version(label):
+    """Увеличивает версию данных модели."""
+    cache = get_cache()
+    key = _version_key(label)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def record_lookup(label, outcome):
+    """Учитывает попадание или промах кэша."""
+    cache = get_cache()
+    key = _stats_key(label, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def cache_stats(labels):
+    """Возвращает счётчики попаданий и промахов по моделям."""
+    cache = get_cache()
+    stats = {}
+    for label in labels:
+        counters = cache.get_many(
+            [_stats_key(label, HIT), _stats_key(label, MISS)]
+        )
+        stats[label] = {
+            outcome: counters.get(_stats_key(label, outcome), 0)
+            for outcome in (HIT, MISS)
+        }
+    return stats
+
+
+class CachedListMixin:
+    """
+    Кэширует ответы list по версии модели и строке запроса.
+
+    get_cache_label    -- Возвращает метку модели для версии и счётчиков.
+    get_list_cache_key -- Возвращает ключ кэша для запроса.
+    list               -- Отдаёт список из кэша или сохраняет его в кэш.
+
+    При промахе список читается из default, а не из реплики.
+    """
+
+    def get_cache_label(self):
+        """Возвращает метку модели для версии и счётчиков."""
+        return self.queryset.model._meta.label_lower
+
+    def get_list_cache_key(self, request):
+        """Возвращает ключ кэша для запроса."""
+        label = self.get_cache_label()
+        location = hashlib.md5(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+        return f'{KEY_PREFIX}:list:{label}:{get_version(label)}:{location}'
+
+    def list(self, request, *args, **kwargs):
+        """Отдаёт список из кэша или сохраняет его в кэш."""
+        label = self.get_cache_label()
+        key = self.get_list_cache_key(request)
+        data = get_cache().get(key)
+        if data is not None:
+            record_lookup(label, HIT)
+            return Response(data, headers={'X-Cache': 'HIT'})
+        record_lookup(label, MISS)
+        with read_from_primary():
+            response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            get_cache().set(
+                key, response.data, timeout=settings.API_CACHE_TIMEOUT
+            )
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,113 @@
+"""
+Условные GET-запросы приложения api.
+
+ConditionalGetMixin -- Отвечает 304 по ETag и Last-Modified
+                       до выполнения основного запроса.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 по ETag и Last-Modified до выполнения основного запроса.
+
+    Валидаторы строятся из отметки времени изменения ресурса
+    (поле modified), а не из тела ответа. Для условного запроса
+    отметка читается одним запросом по первичному ключу, и при
+    совпадении валидаторов основной queryset не выполняется.
+
+    conditional_actions  -- Действия, для которых считаются валидаторы.
+    get_last_modified    -- Возвращает отметку изменения ресурса или None.
+    get_etag_parts       -- Возвращает дополнительные части ETag.
+    get_etag             -- Возвращает ETag ответа.
+    get_object           -- Запоминает отметку изменения объекта.
+    conditional_response -- Отвечает 304 или выполняет обработчик.
+    set_validators       -- Добавляет ETag и Last-Modified в ответ.
+    list                 -- Список с проверкой условных заголовков.
+    retrieve             -- Объект с проверкой условных заголовков.
+    """
+
+    conditional_actions = ()
+    last_modified = None
+
+    def get_last_modified(self):
+        """Возвращает отметку изменения ресурса или None."""
+        raise NotImplementedError
+
+    def get_etag_parts(self):
+        """Возвращает дополнительные части ETag."""
+        return ()
+
+    def get_etag(self, request):
+        """Возвращает ETag ответа."""
+        parts = (
+            self.action,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            self.last_modified.isoformat(),
+            *self.get_etag_parts(),
+        )
+        raw = '|'.join(str(part) for part in parts)
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def get_object(self):
+        """Запоминает отметку изменения объекта."""
+        instance = super().get_object()
+        if self.action in self.conditional_actions:
+            self.last_modified = getattr(instance, 'modified', None)
+        return instance
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """
+        Отвечает 304 или выполняет обработчик.
+
+        Для безусловного retrieve отметка берётся из загруженного
+        объекта, поэтому лишнего запроса нет.
+        """
+        self.last_modified = None
+        conditional = any(header in request.META
+                          for header in CONDITIONAL_HEADERS)
+        if conditional or self.action != 'retrieve':
+            self.last_modified = self.get_last_modified()
+        if conditional and self.last_modified is not None:
+            response = get_conditional_response(
+                request,
+                etag=self.get_etag(request),
+                last_modified=int(self.last_modified.timestamp())
+            )
+            if response is not None:
+                return self.set_validators(request, response)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and self.last_modified is not None:
+            self.set_validators(request, response)
+        return response
+
+    def set_validators(self, request, response):
+        """Добавляет ETag и Last-Modified в ответ."""
+        response['ETag'] = self.get_etag(request)
+        response['Last-Modified'] = http_date(
+            int(self.last_modified.timestamp())
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Список с проверкой условных заголовков."""
+        if 'list' in self.conditional_actions:
+            return self.conditional_response(
+                super().list, request, *args, **kwargs
+            )
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Объект с проверкой условных заголовков."""
+        if 'retrieve' in self.conditional_actions:
+            return self.conditional_response(
+                super().retrieve, request, *args, **kwargs
+            )
+        return super().retrieve(request, *args, **kwargs)
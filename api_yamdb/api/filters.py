@@ -1,28 +1,69 @@
 """
 Фильтры приложения api.
 
-TitleFilter -- Кастом фильтр для модели title.
+CharInFilter -- Фильтр по списку строк через запятую.
+TitleFilter  -- Кастом фильтр для модели title.
 """
 
+from django.db.models import Count
 from django_filters import rest_framework as filters
 from reviews.models import Title
+from reviews.search import search_titles
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Фильтр по списку строк через запятую."""
 
 
 class TitleFilter(filters.FilterSet):
-    """Кастом фильтр для модели title."""
+    """
+    Кастом фильтр для модели title.
+
+    genre=drama,comedy отбирает произведения хотя бы с одним из жанров,
+    вместе с genre_match=all -- произведения со всеми жанрами сразу.
+
+    filter_genre       -- Отбор по точным слагам жанров одним подзапросом.
+    filter_genre_match -- Режим отбора учитывается в filter_genre.
+    filter_search      -- Полнотекстовый поиск по названию и описанию.
+    """
+
+    GENRE_MATCH_ANY = 'any'
+    GENRE_MATCH_ALL = 'all'
 
     name = filters.CharFilter(field_name='name', lookup_expr='contains')
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='contains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='contains'
+    category = filters.CharFilter(field_name='category__slug')
+    category__in = CharInFilter(field_name='category__slug', lookup_expr='in')
+    genre = CharInFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=((GENRE_MATCH_ANY, 'any'), (GENRE_MATCH_ALL, 'all')),
+        method='filter_genre_match'
     )
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         """Метакласс фильтра TitleFilter."""
 
         model = Title
-        fields = ['name', 'genre', 'category', 'year']
+        fields = ['name', 'genre', 'category', 'year', 'search']
+
+    def filter_genre(self, queryset, name, value):
+        """Отбор по точным слагам жанров одним подзапросом."""
+        slugs = set(value)
+        title_genres = Title.genre.through.objects.filter(
+            genre__slug__in=slugs
+        ).values('title_id')
+        if self.form.cleaned_data.get('genre_match') == self.GENRE_MATCH_ALL:
+            title_genres = title_genres.annotate(
+                matched=Count('genre_id', distinct=True)
+            ).filter(matched=len(slugs))
+        return queryset.filter(pk__in=title_genres.values('title_id'))
+
+    def filter_genre_match(self, queryset, name, value):
+        """Режим отбора учитывается в filter_genre."""
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        return search_titles(queryset, value)
@@ -0,0 +1,22 @@
+from api.cache import cache_stats, get_version
+from django.core.management import BaseCommand
+from reviews.models import Categories, Genre
+
+
+class Command(BaseCommand):
+    """
+    Вывод счётчиков кэша ответов для жанров и категорий
+    """
+
+    help = 'Показывает попадания, промахи и версии кэша ответов'
+
+    def handle(self, *args, **kwargs):
+        labels = [model._meta.label_lower for model in (Genre, Categories)]
+        for label, counters in cache_stats(labels).items():
+            total = counters['hit'] + counters['miss']
+            ratio = counters['hit'] / total if total else 0
+            self.stdout.write(
+                f'{label}: версия {get_version(label)}, '
+                f'попаданий {counters["hit"]}, промахов {counters["miss"]}, '
+                f'доля попаданий {ratio:.1%}'
+            )
@@ -0,0 +1,84 @@
+import random
+import time
+
+from api.serializers import TitleBulkSerializer, TitleWriteSerializer
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from reviews.models import Categories, Genre
+
+CATEGORIES = 20
+GENRES = 50
+
+
+class Command(BaseCommand):
+    """
+    Замер пакетного создания произведений против создания по одному
+    """
+
+    help = (
+        'Создаёт произведения через TitleWriteSerializer по одному и '
+        'через POST /titles/bulk/ (TitleBulkSerializer), выводит время '
+        'и число запросов и откатывает изменения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        with transaction.atomic():
+            categories = Categories.objects.bulk_create(
+                Categories(name=f'Категория {i}', slug=f'bench-category-{i}')
+                for i in range(CATEGORIES)
+            )
+            genres = Genre.objects.bulk_create(
+                Genre(name=f'Жанр {i}', slug=f'bench-genre-{i}')
+                for i in range(GENRES)
+            )
+            payload = [
+                {
+                    'name': f'Произведение {i}',
+                    'year': rnd.randint(1900, 2020),
+                    'description': 'Описание',
+                    'category': rnd.choice(categories).slug,
+                    'genre': [
+                        genre.slug for genre in rnd.sample(genres, k=3)
+                    ],
+                }
+                for i in range(options['titles'])
+            ]
+            self.report('по одному', lambda: self.create_each(payload))
+            self.report('пачкой', lambda: self.create_bulk(payload))
+            transaction.set_rollback(True)
+
+    def create_each(self, payload):
+        """Создаёт произведения по одному, как POST /titles/."""
+        for item in payload:
+            serializer = TitleWriteSerializer(data=item)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    def create_bulk(self, payload):
+        """Создаёт произведения одной пачкой, как POST /titles/bulk/."""
+        serializer = TitleBulkSerializer(data=payload, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def report(self, label, create):
+        """Замеряет время и число запросов к базе."""
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            create()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label:<10} {elapsed * 1000:10.1f} мс  '
+            f'запросов {queries:>8}'
+        )
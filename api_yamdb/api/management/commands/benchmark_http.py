@@ -0,0 +1,113 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management import BaseCommand, CommandError
+
+CATALOG_PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/1/',
+    '/api/v1/genres/',
+    '/api/v1/categories/',
+    '/api/v1/titles/1/reviews/',
+    '/api/v1/titles/1/reviews/1/comments/',
+)
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный замер чтения каталога по HTTP
+    """
+
+    help = (
+        'Отправляет GET-запросы каталога на каждый сервер с заданной '
+        'конкурентностью и выводит запросы в секунду, p50 и p99. '
+        'Например, gunicorn на :8000 против uvicorn-воркеров на :8001'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'servers', nargs='+',
+            help='Адреса серверов, например http://localhost:8000'
+        )
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument(
+            '--host-header',
+            help='Заголовок Host из ALLOWED_HOSTS, по умолчанию хост сервера'
+        )
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Путь для запросов, можно повторять; '
+                 'по умолчанию эндпоинты каталога'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests и --concurrency больше нуля')
+        paths = options['paths'] or CATALOG_PATHS
+        for server in options['servers']:
+            address = urlsplit(server)
+            if address.scheme != 'http' or not address.hostname:
+                raise CommandError(f'Нужен адрес вида http://host:port: '
+                                   f'{server}')
+            self.host_header = options['host_header'] or address.hostname
+            latencies, errors, elapsed = asyncio.run(self.run(
+                address.hostname, address.port or 80, paths,
+                options['requests'], options['concurrency']
+            ))
+            self.report(server, latencies, errors, elapsed)
+
+    async def run(self, host, port, paths, total, concurrency):
+        """Выполняет total запросов в concurrency параллельных клиентах."""
+        latencies = []
+        errors = 0
+        counter = iter(range(total))
+
+        async def client():
+            nonlocal errors
+            for number in counter:
+                started = time.perf_counter()
+                try:
+                    status = await self.fetch(
+                        host, port, paths[number % len(paths)]
+                    )
+                except OSError:
+                    status = None
+                latencies.append(time.perf_counter() - started)
+                if status is None or status >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+    async def fetch(self, host, port, path):
+        """Отправляет GET-запрос и возвращает код ответа."""
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: {self.host_header}\r\n'
+                f'Connection: close\r\n\r\n'.encode()
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()
+        finally:
+            writer.close()
+        parts = status_line.split()
+        return int(parts[1]) if len(parts) > 1 else None
+
+    def report(self, server, latencies, errors, elapsed):
+        """Выводит пропускную способность и задержки."""
+        latencies.sort()
+
+        def percentile(share):
+            return latencies[min(len(latencies) - 1,
+                                 int(len(latencies) * share))] * 1000
+
+        self.stdout.write(
+            f'{server:<28} {len(latencies) / elapsed:8.1f} запр/с  '
+            f'p50 {percentile(0.5):7.1f} мс  p99 {percentile(0.99):7.1f} мс  '
+            f'ошибок {errors}'
+        )
@@ -0,0 +1,138 @@
+import random
+import time
+from io import BytesIO
+
+from api.parsers import OrjsonParser
+from api.renderers import OrjsonRenderer
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Categories, Comment, Genre, Review, Title
+from users.models import User
+
+TEXT = (
+    'Благодарные или возмущённые читатели оставляют к произведениям '
+    'текстовые отзывы и выставляют произведению оценку. '
+)
+
+
+class Command(BaseCommand):
+    """
+    Замер рендеринга и разбора JSON: JSONRenderer против orjson
+    """
+
+    help = (
+        'Сериализует страницы произведений, отзывов и комментариев '
+        'и выводит время рендеринга и разбора через DRF и через orjson '
+        'на одну страницу; тестовые данные откатываются'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['page_size'] < 1 or options['repeat'] < 1:
+            raise CommandError('--page-size и --repeat больше нуля')
+        with transaction.atomic():
+            payloads = self.build_payloads(
+                options['page_size'], random.Random(options['seed'])
+            )
+            transaction.set_rollback(True)
+        for label, data in payloads.items():
+            self.report(label, data, options['repeat'])
+
+    def build_payloads(self, size, rnd):
+        """Создаёт данные и возвращает выход сериализаторов страниц."""
+        # На SQLite bulk_create не возвращает id, поэтому созданные
+        # строки перечитываются.
+        category = Categories.objects.create(
+            name='Книги', slug='bench-books'
+        )
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {i}', slug=f'bench-genre-{i}')
+            for i in range(10)
+        )
+        genres = list(Genre.objects.filter(slug__startswith='bench-genre-'))
+        User.objects.bulk_create(
+            User(username=f'bench-{i}', email=f'bench-{i}@yamdb.fake')
+            for i in range(size)
+        )
+        authors = list(User.objects.filter(username__startswith='bench-'))
+        Title.objects.bulk_create(
+            Title(
+                name=f'Произведение {i}', year=rnd.randint(1900, 2020),
+                description=TEXT, category=category,
+                score_sum=rnd.randint(10, 100), review_count=10
+            )
+            for i in range(size)
+        )
+        titles = list(Title.objects.filter(category=category))
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title=title, genre=genre)
+            for title in titles for genre in rnd.sample(genres, k=3)
+        )
+        Review.objects.bulk_create(
+            Review(title=titles[0], author=author, text=TEXT,
+                   score=rnd.randint(1, 10))
+            for author in authors
+        )
+        review = Review.objects.filter(title=titles[0]).first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text=TEXT)
+            for author in authors
+        )
+        return {
+            'произведения': TitleSerializer(
+                Title.objects.select_related('category').prefetch_related(
+                    Prefetch('genre', queryset=Genre.objects.all())
+                ).filter(category=category),
+                many=True
+            ).data,
+            'отзывы': ReviewSerializer(
+                Review.objects.select_related('author').filter(
+                    title=titles[0]
+                ),
+                many=True
+            ).data,
+            'комментарии': CommentSerializer(
+                Comment.objects.select_related('author').filter(
+                    review=review
+                ),
+                many=True
+            ).data,
+        }
+
+    def report(self, label, data, repeat):
+        """Замеряет рендеринг и разбор одной страницы."""
+        body = JSONRenderer().render(data)
+        if OrjsonRenderer().render(data) != body:
+            raise CommandError(f'{label}: вывод orjson отличается')
+        timings = []
+        for renderer, parser in (
+            (JSONRenderer(), JSONParser()),
+            (OrjsonRenderer(), OrjsonParser()),
+        ):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                renderer.render(data)
+            rendered = time.perf_counter() - started
+            started = time.perf_counter()
+            for _ in range(repeat):
+                parser.parse(BytesIO(body))
+            timings.append((rendered, time.perf_counter() - started))
+        (drf_render, drf_parse), (fast_render, fast_parse) = timings
+        self.stdout.write(
+            f'{label:<12} {len(body) / 1024:7.1f} КБ  '
+            f'рендеринг {drf_render / repeat * 1e6:8.1f} -> '
+            f'{fast_render / repeat * 1e6:7.1f} мкс '
+            f'(x{drf_render / fast_render:.1f})  '
+            f'разбор {drf_parse / repeat * 1e6:8.1f} -> '
+            f'{fast_parse / repeat * 1e6:7.1f} мкс '
+            f'(x{drf_parse / fast_parse:.1f})'
+        )
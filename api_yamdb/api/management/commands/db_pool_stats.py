@@ -0,0 +1,62 @@
+import time
+
+from django.core.management import BaseCommand
+
+from api_yamdb.backends.postgresql_pool.pool import pool_stats
+
+
+class Command(BaseCommand):
+    """
+    Вывод счётчиков пула подключений к базе по процессам
+    """
+
+    help = (
+        'Показывает занятые и свободные подключения пула, ожидания '
+        'и открытия подключений в каждом процессе. С --interval '
+        'считает открытия и ожидания в секунду за этот интервал'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--interval', type=float, default=0)
+
+    def handle(self, *args, **options):
+        before = {}
+        if options['interval'] > 0:
+            before = {
+                stats['process']: stats
+                for stats in pool_stats(options['database'])
+            }
+            time.sleep(options['interval'])
+        processes = pool_stats(options['database'])
+        if not processes:
+            self.stdout.write(
+                'Пул не публиковал счётчики: он выключен (DB_POOL_SIZE) '
+                'или кэш ответов не общий для процессов'
+            )
+            return
+        for stats in processes:
+            previous = before.get(stats['process'], stats)
+            self.stdout.write(self.format(stats, previous))
+
+    def format(self, stats, previous):
+        """Возвращает строку счётчиков одного процесса."""
+        line = (
+            f'{stats["process"]}: занято '
+            f'{stats["checked_out"]}/{stats["size"]}, '
+            f'свободно {stats["idle"]}, открыто подключений '
+            f'{stats["connects"]}, ожиданий {stats["waits"]} '
+            f'({stats["wait_time"]:.2f} с), отказов {stats["timeouts"]}'
+        )
+        elapsed = stats['updated'] - previous['updated']
+        if elapsed <= 0:
+            elapsed = stats['updated'] - stats['started']
+            previous = dict(previous, connects=0, waits=0)
+        if elapsed > 0:
+            line += (
+                f', открытий/с '
+                f'{(stats["connects"] - previous["connects"]) / elapsed:.2f}'
+                f', ожиданий/с '
+                f'{(stats["waits"] - previous["waits"]) / elapsed:.2f}'
+            )
+        return line
@@ -0,0 +1,85 @@
+"""
+Пагинация приложения api.
+
+CountedPaginator             -- Пагинатор Django с известным заранее
+                                числом объектов.
+PageNumberOrCursorPagination -- Постраничная пагинация с переходом
+                                на курсорную по параметру cursor.
+"""
+
+from functools import partial
+
+from django.core.paginator import Paginator
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CountedPaginator(Paginator):
+    """
+    Пагинатор Django с известным заранее числом объектов.
+
+    Если count передан, запрос COUNT(*) не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с переходом на курсорную по параметру cursor.
+
+    Без параметра cursor ответы совпадают с PageNumberPagination.
+    Запрос с ?cursor= (в том числе пустым) отдаёт страницы по ключу
+    сортировки вьюсета cursor_ordering без подсчёта COUNT(*) и OFFSET.
+    Если у вьюсета есть get_paginator_count, число объектов берётся
+    из него, а не из COUNT(*).
+
+    get_cursor_paginator   -- Возвращает курсорную пагинацию
+                              с сортировкой вьюсета.
+    paginate_queryset      -- Выбирает вид пагинации и режет queryset.
+    get_paginated_response -- Возвращает ответ выбранной пагинации.
+    to_html                -- Возвращает html-ссылки выбранной пагинации.
+    """
+
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('id',)
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def get_cursor_paginator(self, view):
+        """Возвращает курсорную пагинацию с сортировкой вьюсета."""
+        paginator = CursorPagination()
+        paginator.cursor_query_param = self.cursor_query_param
+        paginator.ordering = getattr(
+            view, 'cursor_ordering', self.cursor_ordering
+        )
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выбирает вид пагинации и режет queryset."""
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.get_cursor_paginator(view)
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        get_count = getattr(view, 'get_paginator_count', None)
+        self.django_paginator_class = partial(
+            CountedPaginator, count=get_count() if get_count else None
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """Возвращает ответ выбранной пагинации."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        """Возвращает html-ссылки выбранной пагинации."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
@@ -0,0 +1,41 @@
+"""
+Парсеры приложения api.
+
+OrjsonParser -- JSON-парсер на orjson.
+"""
+
+import codecs
+from io import BytesIO
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import OrjsonRenderer
+
+
+class OrjsonParser(JSONParser):
+    """
+    JSON-парсер на orjson.
+
+    Тело в UTF-8 разбирает orjson. Тело в другой кодировке и то,
+    что orjson не принимает (целые больше 64 бит, ошибки), разбирает
+    JSONParser, поэтому и сообщения об ошибках остаются прежними.
+
+    parse -- Разбирает тело запроса.
+    """
+
+    renderer_class = OrjsonRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Разбирает тело запроса."""
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET
+        )
+        if codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -6,6 +6,10 @@ IsAuthorOrIsModeratorOrAdminOrReadOnly -- Общие ограничения на
                                           для всех видов пользователей.
 IsAdminOrReadOnly                      -- Права изменения у админа,
                                           остальным только просмотр.
+
+Разрешения читают только role, is_staff и is_superuser пользователя.
+Для токена с ролями эти поля берутся из самого токена
+(api.authentication), и проверка обходится без запроса к базе.
 """
 
 from rest_framework import permissions
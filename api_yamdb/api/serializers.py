@@ -1,11 +1,18 @@
 """
 Сериализаторы приложения api.
 
+get_includes        -- Возвращает имена из параметра include запроса.
+OptionalFieldsMixin -- Отдаёт необязательные поля только
+                       по параметру include.
 GenreSerializer    -- Сериализатор модели Genre.
 CategorySerializer -- Сериализатор модели Category.
 TitleSerializer    -- Сериализатор модели Title.
-ReviewSerializer   -- Сериализатор модели Review.
+LeaderboardEntrySerializer -- Сериализатор строки рейтинговой таблицы.
+TitleWriteSerializer   -- Сериализатор записи для модели Title.
+TitleBulkListSerializer -- Пакетная проверка и создание произведений.
+TitleBulkSerializer    -- Сериализатор произведения в пакетной загрузке.
 CommentSerializer  -- Сериализатор модели Comment.
+ReviewSerializer   -- Сериализатор модели Review.
 SignUpSerializer   -- Сериализатор для вьюсета регистрации пользователя.
 TokenSerializer    -- Сериализатор для вьюсета получения токена пользователем.
 UserSerializer     -- Сериализатор для модели User.
@@ -13,13 +20,21 @@ UserMeSerializer   -- Сериализатор для работы с данны
 
 """
 
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Q
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
-from reviews.models import Categories, Comment, Genre, Review, Title
+from reviews.leaderboard import add_titles
+from reviews.models import (Categories, Comment, Genre, LeaderboardEntry,
+                            Review, Title)
 from reviews.validators import validate_one_to_ten
 from users.models import User
 from users.validators import validate_email_address, validate_username
 
+TITLE_COUNTER_FIELDS = (*Title.COUNTER_FIELDS, 'modified')
+
 
 class GenreSerializer(serializers.ModelSerializer):
     """
@@ -53,12 +68,42 @@ class CategorySerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleSerializer(serializers.ModelSerializer):
+def get_includes(request):
+    """Возвращает имена из параметра include запроса."""
+    if request is None:
+        return set()
+    return set(request.query_params.get('include', '').split(','))
+
+
+class OptionalFieldsMixin:
+    """
+    Отдаёт необязательные поля только по параметру include.
+
+    optional_fields -- Значение include и включаемые им поля.
+
+    get_fields -- Убирает необязательные поля, не указанные в include.
+    """
+
+    optional_fields = {}
+
+    def get_fields(self):
+        """Убирает необязательные поля, не указанные в include."""
+        fields = super().get_fields()
+        includes = get_includes(self.context.get('request'))
+        for include, names in self.optional_fields.items():
+            if include not in includes:
+                for name in names:
+                    fields.pop(name, None)
+        return fields
+
+
+class TitleSerializer(OptionalFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор модели Title.
 
-    get_rating -- Возвращает округлённую среднюю оценку
-                  всех произведений.
+    rating    -- Хранимая округлённая средняя оценка произведения.
+    histogram -- Число отзывов с каждой оценкой,
+                 отдаётся по параметру include=histogram.
 
     Субклассы:
     Meta -- Метакласс сериализатора TitleSerializer.
@@ -67,12 +112,34 @@ class TitleSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(read_only=True, many=True)
     category = CategorySerializer(read_only=True)
     rating = serializers.IntegerField(read_only=True)
+    histogram = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    optional_fields = {'histogram': ('histogram',)}
 
     class Meta:
         """Метакласс сериализатора TitleSerializer."""
 
         model = Title
-        fields = '__all__'
+        exclude = TITLE_COUNTER_FIELDS
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """
+    Сериализатор строки рейтинговой таблицы.
+
+    Субклассы:
+    Meta -- Метакласс сериализатора LeaderboardEntrySerializer.
+    """
+
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+        """Метакласс сериализатора LeaderboardEntrySerializer."""
+
+        model = LeaderboardEntry
+        fields = ('average', 'review_count', 'title')
 
 
 class TitleWriteSerializer(serializers.ModelSerializer):
@@ -96,16 +163,179 @@ class TitleWriteSerializer(serializers.ModelSerializer):
     class Meta:
         """Метакласс сериализатора TitleWriteSerializer."""
 
-        fields = '__all__'
+        exclude = TITLE_COUNTER_FIELDS
         model = Title
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """
+    Пакетная проверка и создание произведений.
+
+    Слаги категорий и жанров всех элементов разрешаются одним
+    запросом на модель, произведения и связи с жанрами создаются
+    через bulk_create в одной транзакции. Ошибки возвращаются
+    списком по позициям элементов, при любой ошибке ничего
+    не создаётся.
+
+    to_internal_value -- Проверяет элементы и разрешает слаги.
+    resolve_slugs     -- Заменяет слаги категорий и жанров объектами.
+    create            -- Создаёт произведения и связи с жанрами.
+    """
+
+    def to_internal_value(self, data):
+        """Проверяет элементы и разрешает слаги."""
+        if not isinstance(data, list) or not data:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Ожидается непустой список произведений.'
+                ]
+            })
+        if len(data) > settings.TITLES_BULK_LIMIT:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'За один запрос можно создать не больше '
+                    f'{settings.TITLES_BULK_LIMIT} произведений.'
+                ]
+            })
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+        self.resolve_slugs(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def resolve_slugs(self, items, errors):
+        """
+        Заменяет слаги категорий и жанров объектами.
+
+        Неизвестные слаги записываются в ошибки элемента.
+        """
+        valid = [item for item in items if item is not None]
+        categories = Categories.objects.in_bulk(
+            {item['category'] for item in valid}, field_name='slug'
+        )
+        genres = Genre.objects.in_bulk(
+            {slug for item in valid for slug in item['genre']},
+            field_name='slug'
+        )
+        for item, item_errors in zip(items, errors):
+            if item is None:
+                continue
+            if item['category'] not in categories:
+                item_errors['category'] = [
+                    f'Категория {item["category"]} не найдена.'
+                ]
+            missing = [slug for slug in item['genre'] if slug not in genres]
+            if missing:
+                item_errors['genre'] = [
+                    f'Жанр {slug} не найден.' for slug in missing
+                ]
+            if not item_errors:
+                item['category'] = categories[item['category']]
+                item['genre'] = [
+                    genres[slug] for slug in dict.fromkeys(item['genre'])
+                ]
+
+    def create(self, validated_data):
+        """
+        Создаёт произведения и связи с жанрами.
+
+        Строки рейтинговой таблицы новых произведений создаются
+        той же пачкой. Если база не возвращает первичные ключи
+        из пакетной вставки (SQLite в Django 3.2), произведения
+        сохраняются по одному, а связи с жанрами и строки рейтинга
+        всё равно создаются пачками.
+        """
+        titles = [
+            Title(**{
+                field: value for field, value in item.items()
+                if field != 'genre'
+            })
+            for item in validated_data
+        ]
+        through = Title.genre.through
+        using = router.db_for_write(Title)
+        with transaction.atomic(using=using):
+            bulk = connections[using].features.can_return_rows_from_bulk_insert
+            if bulk:
+                Title.objects.bulk_create(titles)
+            else:
+                for title in titles:
+                    title.save(using=using)
+            through.objects.bulk_create(
+                through(title_id=title.pk, genre_id=genre.pk)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genre']
+            )
+            add_titles(
+                (title, [genre.pk for genre in item['genre']])
+                for title, item in zip(titles, validated_data)
+            )
+        return titles
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор произведения в пакетной загрузке.
+
+    Категория и жанры принимаются слагами и проверяются
+    списочным сериализатором TitleBulkListSerializer.
+
+    Субклассы:
+    Meta -- Метакласс сериализатора TitleBulkSerializer.
+    """
+
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        """Метакласс сериализатора TitleBulkSerializer."""
+
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = TitleBulkListSerializer
+
+
+class CommentSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор модели Comment.
+
+    Субклассы:
+    Meta -- Метакласс сериализатора CommentSerializer.
+    """
+
+    author = serializers.SlugRelatedField(
+        slug_field='username',
+        read_only=True
+    )
+
+    class Meta:
+        """Метакласс сериализатора CommentSerializer."""
+
+        model = Comment
+        fields = ('id', 'text', 'author', 'pub_date')
+        read_only_fields = ('id', 'pub_date')
+
+
+class ReviewSerializer(OptionalFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор модели Review.
 
+    comments      -- Последние комментарии к отзыву,
+                     отдаются по параметру include=comments.
+    comment_count -- Число комментариев к отзыву, отдаётся вместе
+                     с comments.
+
     validate_score -- Проверяет правильность поля score.
-    validate       -- Проверяет уникальность пары "произведение, автор".
+
+    Повторный отзыв автора на произведение отсекает ограничение
+    unique_review в базе, см. ReviewViewSet.perform_create.
 
     Субклассы:
     Meta -- Метакласс сериализатора ReviewSerializer.
@@ -115,12 +345,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         slug_field='username',
         read_only=True
     )
+    comments = CommentSerializer(
+        source='latest_comments', many=True, read_only=True
+    )
+    comment_count = serializers.IntegerField(read_only=True)
+
+    optional_fields = {'comments': ('comments', 'comment_count')}
 
     class Meta:
         """Метакласс сериализатора ReviewSerializer."""
 
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments', 'comment_count')
         read_only_fields = ('id', 'pub_date')
 
     def validate_score(self, value):
@@ -128,21 +365,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         validate_one_to_ten(value, serializers.ValidationError)
         return value
 
-    def validate(self, data):
-        """Проверяет уникальность пары "произведение, автор"."""
-        request = self.context['request']
-        title_id = request.parser_context['kwargs']['title_id']
-        author = request.user
-        same_review = Review.objects.filter(author=author, title=title_id)
-        if same_review.exists() and request.method == 'POST':
-            raise serializers.ValidationError(
-                'Вы уже оставили отзыв на это произведение'
-            )
-        return data
-
 
 class SignUpSerializer(serializers.Serializer):
-    """Сериализатор для вьюсета регистрации пользователя."""
+    """
+    Сериализатор для вьюсета регистрации пользователя.
+
+    Регистрация стоит одного поиска по username и email и одной
+    вставки, конфликты параллельных регистраций ловят уникальные
+    индексы модели User.
+
+    find_user -- Ищет пользователя по username и email одним запросом.
+    validate  -- Валидация данных при регистрации пользователя.
+    create    -- Возвращает найденного пользователя или создаёт нового.
+    """
 
     username = serializers.CharField(
         required=True,
@@ -155,6 +390,33 @@ class SignUpSerializer(serializers.Serializer):
         validators=[validate_email_address]
     )
 
+    def find_user(self, data):
+        """
+        Ищет пользователя по username и email одним запросом.
+
+        Возвращает пользователя с той же парой username/e-mail
+        для повторной отправки кода подтверждения или None.
+        Если username или e-mail заняты другим пользователем,
+        поднимает ValidationError.
+        """
+        matches = list(User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        )[:2])
+        for user in matches:
+            if (user.username, user.email) == (
+                data['username'], data['email']
+            ):
+                return user
+        if any(user.username == data['username'] for user in matches):
+            raise serializers.ValidationError(
+                'Пользователь с таким username уже существует!'
+            )
+        if matches:
+            raise serializers.ValidationError(
+                'Пользователь с таким email уже существует!'
+            )
+        return None
+
     def validate(self, data):
         """
         Валидация данных при регистрации пользователя.
@@ -166,19 +428,34 @@ class SignUpSerializer(serializers.Serializer):
         -- Проверка для запрета регистрации нового пользователя
         с уже зарегистрированным в приложении e-mail.
         """
-        if User.objects.filter(username=data['username'],
-                               email=data['email']).exists():
-            return data
-        if User.objects.filter(username=data['username']).exists():
-            raise serializers.ValidationError(
-                'Пользователь с таким username уже существует!'
-            )
-        if User.objects.filter(email=data['email']).exists():
-            raise serializers.ValidationError(
-                'Пользователь с таким email уже существует!'
-            )
+        self.existing_user = self.find_user(data)
         return data
 
+    def create(self, validated_data):
+        """
+        Возвращает найденного пользователя или создаёт нового.
+
+        Если между проверкой и вставкой такой же username или
+        e-mail успел зарегистрировать параллельный запрос, конфликт
+        ловит уникальный индекс, и ответ строится по повторному поиску.
+        """
+        if self.existing_user is not None:
+            return self.existing_user
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            try:
+                user = self.find_user(validated_data)
+            except serializers.ValidationError as error:
+                # Ответ той же формы, что и ошибка из validate.
+                raise serializers.ValidationError(
+                    {api_settings.NON_FIELD_ERRORS_KEY: error.detail}
+                )
+            if user is None:
+                raise
+            return user
+
 
 class TokenSerializer(serializers.Serializer):
     """Сериализатор для вьюсета получения токена."""
@@ -242,24 +519,3 @@ class UserMeSerializer(serializers.ModelSerializer):
             'role'
         )
         read_only_fields = ('role',)
-
-
-class CommentSerializer(serializers.ModelSerializer):
-    """
-    Сериализатор модели Comment.
-
-    Субклассы:
-    Meta -- Метакласс сериализатора CommentSerializer.
-    """
-
-    author = serializers.SlugRelatedField(
-        slug_field='username',
-        read_only=True
-    )
-
-    class Meta:
-        """Метакласс сериализатора CommentSerializer."""
-
-        model = Comment
-        fields = ('id', 'text', 'author', 'pub_date')
-        read_only_fields = ('id', 'pub_date')
@@ -0,0 +1,45 @@
+"""
+Сигналы приложения api.
+
+bump_catalog_version -- Сбрасывает кэш списков жанров и категорий
+                        при изменении модели.
+forget_changed_user  -- Сбрасывает кэш пользователя при его изменении.
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Categories, Genre
+from users.models import User
+
+from .authentication import forget_user
+from .cache import bump_version
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Categories)
+@receiver(post_delete, sender=Categories)
+def bump_catalog_version(sender, **kwargs):
+    """
+    Сбрасывает кэш списков жанров и категорий при изменении модели.
+
+    Версия меняется после фиксации транзакции: иначе параллельный
+    запрос закэширует под новой версией данные до фиксации.
+    """
+    transaction.on_commit(partial(bump_version, sender._meta.label_lower))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш пользователя при его изменении.
+
+    Кэш сбрасывается сразу и ещё раз после фиксации транзакции,
+    чтобы параллельный запрос не вернул в кэш старые данные.
+    """
+    forget_user(instance.pk)
+    transaction.on_commit(partial(forget_user, instance.pk))
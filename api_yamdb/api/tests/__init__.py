@@ -0,0 +1,7 @@
+"""
+Тесты приложения api.
+
+Запускаются через manage.py test, например на SQLite:
+DB_ENGINE=django.db.backends.sqlite3 DB_NAME=test.sqlite3 \
+python manage.py test api
+"""
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+from api.async_views import pooled_urls, pooled_view
+from api.urls import CATALOG_VIEWSETS, router_v1
+from api.views import GenreViewSet, UserViewSet
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import path
+from reviews.models import Genre
+
+SLOW_SECONDS = 0.3
+
+
+def thread_name_view(request):
+    return HttpResponse(threading.current_thread().name)
+
+
+def slow_view(request):
+    time.sleep(SLOW_SECONDS)
+    return HttpResponse(threading.current_thread().name)
+
+
+urlpatterns = [path('api/v1/slow/', pooled_view(slow_view))]
+
+
+class TestPooledView(SimpleTestCase):
+
+    def test_reads_run_in_catalog_pool(self):
+        view = async_to_sync(pooled_view(thread_name_view))
+        response = view(RequestFactory().get('/'))
+        self.assertTrue(response.content.startswith(b'catalog'))
+        response = view(RequestFactory().post('/'))
+        self.assertFalse(response.content.startswith(b'catalog'))
+
+    def test_only_catalog_views_are_replaced(self):
+        patterns = pooled_urls(router_v1.urls, CATALOG_VIEWSETS)
+        for pattern in patterns:
+            view_class = getattr(pattern.callback, 'cls', None)
+            self.assertEqual(
+                asyncio.iscoroutinefunction(pattern.callback),
+                view_class in CATALOG_VIEWSETS,
+                pattern.name
+            )
+        self.assertTrue(any(
+            getattr(pattern.callback, 'cls', None) is UserViewSet
+            for pattern in patterns
+        ))
+
+
+class TestPooledCatalog(TransactionTestCase):
+
+    def test_pooled_list_matches_sync_list(self):
+        Genre.objects.create(name='Драма', slug='drama')
+        sync_view = GenreViewSet.as_view({'get': 'list'})
+        request = RequestFactory().get('/api/v1/genres/')
+        expected = sync_view(request).render().content
+        response = async_to_sync(pooled_view(sync_view))(
+            RequestFactory().get('/api/v1/genres/')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected)
+        self.assertIn('drama', response.content.decode())
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestPooledViewUnderMiddleware(SimpleTestCase):
+
+    async def test_requests_run_concurrently_through_middleware(self):
+        started = time.monotonic()
+        responses = await asyncio.gather(*(
+            self.async_client.get('/api/v1/slow/') for _ in range(4)
+        ))
+        elapsed = time.monotonic() - started
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.content.startswith(b'catalog'))
+        self.assertLess(elapsed, SLOW_SECONDS * 2)
@@ -0,0 +1,148 @@
+from api.cache import get_cache
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Title
+from users.models import User
+
+
+class TestCachedJWTAuthentication(APITestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create(
+            username='reader', email='reader@yamdb.fake'
+        )
+        self.user.set_password('secret')
+        self.user.save()
+        self.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role=User.ADMIN
+        )
+
+    def login(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+
+    def user_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if 'users_user' in query['sql']
+        ]
+        return response, queries
+
+    def test_steady_state_get_needs_no_user_query(self):
+        self.login(self.user)
+        response, queries = self.user_queries('get', '/api/v1/titles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.user_queries('get', '/api/v1/titles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_me_update_invalidates_cache_and_keeps_password(self):
+        self.login(self.user)
+        self.client.get('/api/v1/users/me/')
+        response = self.client.patch('/api/v1/users/me/', {'bio': 'Читаю'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/users/me/').data['bio'],
+                         'Читаю')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('secret'))
+
+    def test_role_change_applies_to_next_request(self):
+        self.login(self.user)
+        response = self.client.get('/api/v1/users/')
+        self.assertEqual(response.status_code, 403)
+        self.login(self.admin)
+        self.client.patch(
+            f'/api/v1/users/{self.user.username}/', {'role': User.ADMIN}
+        )
+        self.login(self.user)
+        self.assertEqual(self.client.get('/api/v1/users/').status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        self.login(self.user)
+        self.client.get('/api/v1/titles/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 401)
+
+
+@override_settings(API_TOKEN_CLAIMS=True)
+class TestRoleClaims(APITestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role=User.ADMIN
+        )
+        self.moderator = User.objects.create(
+            username='moderator', email='moderator@yamdb.fake',
+            role=User.MODERATOR
+        )
+
+    def obtain_token(self, user):
+        self.client.credentials()
+        response = self.client.post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user)
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    def login(self, user):
+        token = self.obtain_token(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return token
+
+    def test_token_carries_role_and_version(self):
+        token = AccessToken(self.obtain_token(self.admin))
+        self.assertEqual(token['role'], User.ADMIN)
+        self.assertEqual(token['token_version'], 0)
+        self.assertFalse(token['is_superuser'])
+
+    def test_admin_write_needs_no_user_query(self):
+        self.login(self.admin)
+        self.client.post('/api/v1/genres/', {'name': 'Драма', 'slug': 'd'})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                '/api/v1/genres/', {'name': 'Комедия', 'slug': 'c'}
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'users_user' in query['sql']
+        ])
+
+    def test_role_change_revokes_old_tokens(self):
+        self.login(self.moderator)
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 200)
+        self.moderator.role = User.USER
+        self.moderator.save()
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 401)
+        self.login(self.moderator)
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 200)
+
+    def test_profile_change_keeps_tokens(self):
+        self.login(self.moderator)
+        self.moderator.bio = 'Модерирую'
+        self.moderator.save()
+        self.assertEqual(self.client.get('/api/v1/titles/').status_code, 200)
+
+    def test_claims_user_can_post_review_and_read_profile(self):
+        title = Title.objects.create(name='Произведение', year=2000)
+        self.login(self.moderator)
+        response = self.client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            {'text': 'Текст', 'score': 8}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['author'], 'moderator')
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.data['email'], 'moderator@yamdb.fake')
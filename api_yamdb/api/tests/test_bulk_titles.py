@@ -0,0 +1,75 @@
+from rest_framework.test import APITestCase
+from reviews.leaderboard import rebuild_leaderboard
+from reviews.models import Categories, Genre, LeaderboardEntry, Title
+from users.models import User
+
+URL = '/api/v1/titles/bulk/'
+
+
+class TestBulkTitles(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@y.fake', role=User.ADMIN
+        )
+        cls.user = User.objects.create(username='user', email='u@y.fake')
+        Categories.objects.create(name='Фильм', slug='movie')
+        Categories.objects.create(name='Книга', slug='book')
+        for slug in ('drama', 'comedy'):
+            Genre.objects.create(name=slug, slug=slug)
+
+    def payload(self, count):
+        return [
+            {
+                'name': f'Произведение {i}',
+                'year': 1990 + i,
+                'category': ('movie', 'book')[i % 2],
+                'genre': ['drama', 'comedy'][:i % 2 + 1],
+            }
+            for i in range(count)
+        ]
+
+    def test_creates_titles_with_genres(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(URL, self.payload(30), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 30)
+        title = Title.objects.get(pk=response.data['ids'][1])
+        self.assertEqual(title.name, 'Произведение 1')
+        self.assertEqual(title.category.slug, 'book')
+        self.assertEqual(
+            set(title.genre.values_list('slug', flat=True)),
+            {'drama', 'comedy'}
+        )
+
+    def test_titles_get_leaderboard_rows(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(URL, self.payload(4), format='json')
+        self.assertEqual(response.status_code, 201)
+        fields = ('title_id', 'scope', 'scope_id', 'review_count')
+        entries = list(LeaderboardEntry.objects.order_by(*fields).values_list(
+            *fields
+        ))
+        self.assertEqual(len(entries), 4 * 2 + 6)
+        rebuild_leaderboard()
+        self.assertEqual(entries, list(
+            LeaderboardEntry.objects.order_by(*fields).values_list(*fields)
+        ))
+
+    def test_reports_errors_by_position_and_creates_nothing(self):
+        self.client.force_authenticate(self.admin)
+        payload = self.payload(3)
+        payload[1]['category'] = 'unknown'
+        payload[2]['year'] = 'год'
+        response = self.client.post(URL, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('category', response.data[1])
+        self.assertIn('year', response.data[2])
+        self.assertFalse(Title.objects.exists())
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(URL, self.payload(1), format='json')
+        self.assertEqual(response.status_code, 403)
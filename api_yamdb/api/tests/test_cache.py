@@ -0,0 +1,55 @@
+from api.cache import get_cache, get_version
+from rest_framework.test import APITestCase
+from reviews.models import Genre
+from users.models import User
+
+
+class TestCatalogCache(APITestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        Genre.objects.create(name='Драма', slug='drama')
+        self.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role=User.ADMIN
+        )
+
+    def test_list_is_served_from_cache(self):
+        first = self.client.get('/api/v1/genres/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/genres/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get('/api/v1/genres/')
+        response = self.client.get('/api/v1/genres/', {'search': 'Ком'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_write_invalidates_list(self):
+        self.client.get('/api/v1/genres/')
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/api/v1/genres/', {'name': 'Комедия', 'slug': 'comedy'}
+            )
+        response = self.client.get('/api/v1/genres/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_model_write_invalidates_list(self):
+        self.client.get('/api/v1/genres/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Genre.objects.get(slug='drama').delete()
+        response = self.client.get('/api/v1/genres/')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_version_changes_after_commit(self):
+        version = get_version('reviews.genre')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Genre.objects.create(name='Комедия', slug='comedy')
+            self.assertEqual(get_version('reviews.genre'), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_version('reviews.genre'), version)
@@ -0,0 +1,92 @@
+from rest_framework.test import APITestCase
+from reviews.models import Comment, Genre, Review, Title
+from users.models import User
+
+
+class TestConditionalGet(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.title.genre.set([Genre.objects.create(name='Драма', slug='drama')])
+        cls.author = User.objects.create(
+            username='author', email='author@yamdb.fake'
+        )
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.author, text='Текст', score=7
+        )
+
+    def assert_not_modified(self, url, queries=1):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        with self.assertNumQueries(queries):
+            cached = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        return response
+
+    def test_title_detail(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        response = self.assert_not_modified(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_review_list_changes_with_new_review(self):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        etag = self.assert_not_modified(url)['ETag']
+        Review.objects.create(
+            title=self.title,
+            author=User.objects.create(username='other', email='o@y.fake'),
+            text='Текст',
+            score=3
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_comment_list_changes_with_new_comment(self):
+        url = (f'/api/v1/titles/{self.title.pk}/reviews/'
+               f'{self.review.pk}/comments/')
+        etag = self.assert_not_modified(url)['ETag']
+        Comment.objects.create(
+            review=self.review, author=self.author, text='Комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_review_list_with_comments_changes_with_new_comment(self):
+        url = (f'/api/v1/titles/{self.title.pk}/reviews/'
+               '?include=comments')
+        etag = self.assert_not_modified(url)['ETag']
+        Comment.objects.create(
+            review=self.review, author=self.author, text='Комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['results'][0]['comments'][0]['text'],
+            'Комментарий'
+        )
+        self.assert_not_modified(url)
+
+    def test_comment_keeps_title_etag(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            review=self.review, author=self.author, text='Комментарий'
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_genre_rename_changes_title_etag(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Genre.objects.filter(slug='drama').get().save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,109 @@
+import threading
+import time
+from io import StringIO
+
+from api.cache import get_cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from psycopg2 import OperationalError
+from psycopg2.extensions import (TRANSACTION_STATUS_IDLE,
+                                 TRANSACTION_STATUS_INTRANS,
+                                 TRANSACTION_STATUS_UNKNOWN)
+
+from api_yamdb.backends.postgresql_pool.pool import ConnectionPool
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rolled_back = False
+        self.usable = True
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rolled_back = True
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+    def cursor(self):
+        if not self.usable:
+            raise OperationalError('server closed the connection')
+        return FakeCursor()
+
+
+class FakeCursor:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        pass
+
+
+class TestConnectionPool(SimpleTestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.pool = ConnectionPool('test', size=2, timeout=0.2, check_after=10)
+
+    def test_released_connection_is_reused(self):
+        first = self.pool.acquire(FakeConnection)
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(FakeConnection), first)
+        self.assertEqual(self.pool.connects, 1)
+
+    def test_exhausted_pool_waits_then_fails(self):
+        self.pool.acquire(FakeConnection)
+        second = self.pool.acquire(FakeConnection)
+        threading.Timer(0.05, self.pool.release, [second]).start()
+        self.assertIs(self.pool.acquire(FakeConnection), second)
+        with self.assertRaises(OperationalError):
+            self.pool.acquire(FakeConnection)
+        self.assertEqual(self.pool.waits, 2)
+        self.assertEqual(self.pool.timeouts, 1)
+
+    def test_open_transaction_is_rolled_back(self):
+        connection = self.pool.acquire(FakeConnection)
+        connection.status = TRANSACTION_STATUS_INTRANS
+        self.pool.release(connection)
+        self.assertTrue(connection.rolled_back)
+        self.assertEqual(self.pool.snapshot()['idle'], 1)
+
+    def test_broken_connection_is_discarded(self):
+        connection = self.pool.acquire(FakeConnection)
+        connection.status = TRANSACTION_STATUS_UNKNOWN
+        self.pool.release(connection)
+        self.assertTrue(connection.closed)
+        snapshot = self.pool.snapshot()
+        self.assertEqual((snapshot['opened'], snapshot['idle']), (0, 0))
+
+    def test_stale_idle_connection_is_checked(self):
+        self.pool.check_after = 0
+        connection = self.pool.acquire(FakeConnection)
+        self.pool.release(connection)
+        connection.usable = False
+        fresh = self.pool.acquire(FakeConnection)
+        self.assertIsNot(fresh, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.snapshot()['opened'], 1)
+
+    def test_stats_are_published_for_command(self):
+        self.pool.alias = 'default'
+        connection = self.pool.acquire(FakeConnection)
+        self.pool.release(connection)
+        self.pool.acquire(FakeConnection)
+        time.sleep(0.01)
+        self.pool._publish(force=True)
+        out = StringIO()
+        call_command('db_pool_stats', stdout=out)
+        self.assertIn('занято 1/2, свободно 0, открыто подключений 1',
+                      out.getvalue())
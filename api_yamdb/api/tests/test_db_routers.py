@@ -0,0 +1,97 @@
+from api.cache import get_cache
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Title
+from users.models import User
+
+from api_yamdb.db_routers import (PIN_COOKIE, ReplicaRoutingMiddleware,
+                                  _weighted_order, read_from_primary)
+
+REPLICAS = {'replica_1': 1, 'replica_2': 1}
+
+
+def read_view(request):
+    return HttpResponse(router.db_for_read(Title))
+
+
+def write_then_read_view(request):
+    router.db_for_write(Title)
+    return HttpResponse(router.db_for_read(Title))
+
+
+def primary_read_view(request):
+    with read_from_primary():
+        return HttpResponse(router.db_for_read(Title))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, DATABASE_REPLICA_PIN_SECONDS=5)
+class TestReplicaRouting(SimpleTestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.factory = RequestFactory()
+
+    def request(self, view, method='get', **extra):
+        request = getattr(self.factory, method)('/api/v1/titles/', **extra)
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_reads_alternate_between_replicas(self):
+        databases = {
+            self.request(read_view).content.decode() for _ in range(4)
+        }
+        self.assertEqual(databases, set(REPLICAS))
+
+    def test_weights_set_share_of_reads(self):
+        order = _weighted_order({'replica_1': 3, 'replica_2': 1})
+        self.assertEqual(order.count('replica_1'), 3)
+        self.assertEqual(order.count('replica_2'), 1)
+        self.assertNotEqual(order[:3], ['replica_1'] * 3)
+
+    def test_unsafe_and_outside_requests_use_primary(self):
+        self.assertEqual(self.request(read_view, 'post').content, b'default')
+        self.assertEqual(router.db_for_read(Title), 'default')
+        self.assertEqual(
+            self.request(primary_read_view).content, b'default'
+        )
+
+    def test_write_pins_client_to_primary(self):
+        response = self.request(write_then_read_view)
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        self.assertEqual(
+            self.request(read_view, HTTP_COOKIE=f'{PIN_COOKIE}=1').content,
+            b'default'
+        )
+
+    def test_write_pins_token_user_to_primary(self):
+        user = User(pk=7, username='writer')
+        header = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+        self.assertIn(
+            self.request(read_view, **header).content.decode(), REPLICAS
+        )
+        self.request(write_then_read_view, 'post', **header)
+        self.assertEqual(self.request(read_view, **header).content, b'default')
+        self.assertIn(self.request(read_view).content.decode(), REPLICAS)
+
+    async def test_async_requests_are_routed_and_pinned(self):
+        async def async_read_view(request):
+            return read_view(request)
+
+        async def async_write_view(request):
+            return write_then_read_view(request)
+
+        request = self.factory.get('/api/v1/titles/')
+        response = await ReplicaRoutingMiddleware(async_read_view)(request)
+        self.assertIn(response.content.decode(), REPLICAS)
+        request = self.factory.post('/api/v1/titles/')
+        response = await ReplicaRoutingMiddleware(async_write_view)(request)
+        self.assertEqual(response.content, b'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS={})
+    def test_no_replicas_no_pinning(self):
+        response = self.request(write_then_read_view)
+        self.assertEqual(response.content, b'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from reviews.export import EXPORTS
+from reviews.models import (Categories, Comment, Genre, ImportDigest, Review,
+                            Title)
+from users.models import User
+
+
+class TestExport(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@y.fake', role=User.ADMIN
+        )
+        cls.user = User.objects.create(username='user', email='u@y.fake')
+        cls.title = Title.objects.create(
+            name='Крестный отец', year=1972, description='Сага, "семейная"'
+        )
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.user, text='Текст\nв две строки',
+            score=9
+        )
+        Comment.objects.create(
+            review=cls.review, author=cls.admin, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def export(self, kind, **params):
+        response = self.client.get(f'/api/v1/export/{kind}/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_matches_import_layout(self):
+        rows = list(csv.DictReader(
+            io.StringIO(self.export('reviews', output='csv'))
+        ))
+        self.assertEqual(
+            list(rows[0]),
+            ['id', 'title_id', 'text', 'author', 'score', 'pub_date']
+        )
+        self.assertEqual(rows[0]['text'], 'Текст\nв две строки')
+        self.assertEqual(rows[0]['author'], str(self.user.pk))
+        rows = list(csv.DictReader(
+            io.StringIO(self.export('titles', output='csv'))
+        ))
+        self.assertEqual(rows[0]['description'], 'Сага, "семейная"')
+
+    def test_ndjson_and_updated_since(self):
+        lines = self.export('comments').splitlines()
+        self.assertEqual(json.loads(lines[0])['review_id'], self.review.pk)
+        tomorrow = (timezone.now() + timedelta(days=1)).date().isoformat()
+        self.assertEqual(self.export('comments', updated_since=tomorrow), '')
+        response = self.client.get(
+            '/api/v1/export/titles/', {'updated_since': 'вчера'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_lookup_tables_ignore_updated_since(self):
+        tomorrow = (timezone.now() + timedelta(days=1)).date().isoformat()
+        rows = list(csv.DictReader(io.StringIO(
+            self.export('users', output='csv', updated_since=tomorrow)
+        )))
+        self.assertEqual(
+            [row['username'] for row in rows], ['admin', 'user']
+        )
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/v1/export/titles/')
+        self.assertEqual(response.status_code, 403)
+
+
+class TestExportImportRoundTrip(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        category = Categories.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name='Драма', slug='drama'),
+            Genre.objects.create(name='Криминал', slug='crime'),
+        ]
+        author = User.objects.create(
+            username='author', email='author@y.fake', bio='О себе',
+            role=User.MODERATOR
+        )
+        title = Title.objects.create(
+            name='Крестный отец', year=1972, category=category,
+            description='Сага, "семейная"'
+        )
+        title.genre.set(genres)
+        Title.objects.create(name='Без категории', year=2000)
+        review = Review.objects.create(
+            title=title, author=author, text='Текст\nв две строки', score=9
+        )
+        Comment.objects.create(review=review, author=author, text='Да')
+
+    def export(self, directory):
+        call_command('export_data', dir=directory, stderr=io.StringIO())
+        files = {}
+        for export in EXPORTS.values():
+            path = os.path.join(directory, export.filename)
+            with open(path, encoding='utf-8') as file:
+                files[export.filename] = file.read()
+        return files
+
+    def test_export_loads_back_unchanged(self):
+        exported = self.export(self.directory)
+        for model in (User, Genre, Categories, ImportDigest):
+            model.objects.all().delete()
+        Title.objects.all().delete()
+        call_command(
+            'import_csv', data_dir=self.directory, stdout=io.StringIO()
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.assertEqual(self.export(directory), exported)
+        title = Title.objects.get(name='Крестный отец')
+        self.assertEqual((title.review_count, title.score_sum), (1, 9))
@@ -0,0 +1,56 @@
+from rest_framework.test import APITestCase
+from reviews.models import Review, Title
+from reviews.ratings import rebuild_ratings
+from users.models import User
+
+
+class TestScoreHistogram(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@y.fake')
+            for i in range(3)
+        ]
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        for user, score in zip(cls.users, (3, 3, 8)):
+            Review.objects.create(
+                title=cls.title, author=user, text='Текст', score=score
+            )
+
+    def histogram(self):
+        return Title.objects.get(pk=self.title.pk).histogram
+
+    def test_counters_follow_reviews(self):
+        expected = {str(score): 0 for score in Title.SCORES}
+        expected.update({'3': 2, '8': 1})
+        self.assertEqual(self.histogram(), expected)
+
+        review = Review.objects.get(author=self.users[0])
+        review.score = 10
+        review.save()
+        Review.objects.get(author=self.users[2]).delete()
+        expected.update({'3': 1, '8': 0, '10': 1})
+        self.assertEqual(self.histogram(), expected)
+
+    def test_rebuild_repairs_drift(self):
+        expected = self.histogram()
+        Title.objects.filter(pk=self.title.pk).update(
+            score_count_3=0, score_count_5=7
+        )
+        rebuild_ratings()
+        self.assertEqual(self.histogram(), expected)
+
+    def test_endpoint_and_optional_field(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{url}histogram/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['review_count'], 3)
+        self.assertEqual(response.data['histogram']['3'], 2)
+
+        self.assertNotIn('histogram', self.client.get(url).data)
+        response = self.client.get(url, {'include': 'histogram'})
+        self.assertEqual(response.data['histogram']['8'], 1)
+        response = self.client.get('/api/v1/titles/999/histogram/')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,166 @@
+import csv
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from reviews.loader import TABLES, load_table, split_csv
+from reviews.models import (Categories, Comment, Genre, ImportDigest,
+                            LeaderboardEntry, Review, Title)
+from users.models import User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def count_rows(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding='utf-8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+class TestImportCsv(TestCase):
+
+    def setUp(self):
+        call_command('import_csv', batch_size=7, stdout=StringIO())
+
+    def test_loads_every_file(self):
+        self.assertEqual(User.objects.count(), count_rows('users.csv'))
+        self.assertEqual(Title.objects.count(), count_rows('titles.csv'))
+        self.assertEqual(Review.objects.count(), count_rows('review.csv'))
+        self.assertEqual(Comment.objects.count(), count_rows('comments.csv'))
+        self.assertEqual(
+            Title.genre.through.objects.count(),
+            count_rows('genre_title.csv')
+        )
+
+    def test_keeps_dates_and_rebuilds_counters(self):
+        review = Review.objects.get(pk=1)
+        self.assertEqual(review.pub_date.year, 2019)
+        title = Title.objects.get(pk=review.title_id)
+        self.assertEqual(title.review_count, title.reviews.count())
+        self.assertTrue(
+            LeaderboardEntry.objects.filter(title=title).exists()
+        )
+
+    def test_full_import_into_filled_tables_fails_up_front(self):
+        Review.objects.all().delete()
+        with self.assertRaisesMessage(CommandError, '--incremental'):
+            call_command('import_csv', stdout=StringIO())
+        self.assertFalse(Review.objects.exists())
+
+    def test_full_import_after_clearing_tables(self):
+        digests = ImportDigest.objects.count()
+        for model in (User, Title, Genre, Categories):
+            model.objects.all().delete()
+        call_command('import_csv', stdout=StringIO())
+        self.assertEqual(Review.objects.count(), count_rows('review.csv'))
+        self.assertEqual(ImportDigest.objects.count(), digests)
+
+    def test_new_rows_get_fresh_ids(self):
+        title = Title.objects.create(name='Новое', year=2000)
+        self.assertGreater(title.pk, count_rows('titles.csv'))
+
+
+class TestIncrementalImport(TestCase):
+
+    def setUp(self):
+        call_command('import_csv', stdout=StringIO())
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        shutil.copytree(DATA_DIR, self.data_dir, dirs_exist_ok=True)
+
+    def rewrite(self, filename, change):
+        path = os.path.join(self.data_dir, filename)
+        with open(path, encoding='utf-8', newline='') as file:
+            rows = list(csv.reader(file))
+        change(rows)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            csv.writer(file).writerows(rows)
+
+    def import_incremental(self):
+        out = StringIO()
+        call_command(
+            'import_csv', incremental=True, data_dir=self.data_dir, stdout=out
+        )
+        return out.getvalue()
+
+    def test_rerun_without_changes_touches_nothing(self):
+        output = self.import_incremental()
+        self.assertIn(
+            'titles.csv: добавлено 0, обновлено 0, без изменений '
+            f'{count_rows("titles.csv")}',
+            output
+        )
+        self.assertEqual(Review.objects.count(), count_rows('review.csv'))
+
+    def test_restores_rows_deleted_from_database(self):
+        Review.objects.filter(pk=1).delete()
+        output = self.import_incremental()
+        self.assertIn('review.csv: добавлено 1, обновлено 0', output)
+        self.assertTrue(Review.objects.filter(pk=1).exists())
+
+    def test_upserts_changed_and_new_rows(self):
+        review = Review.objects.get(pk=1)
+
+        def change_reviews(rows):
+            header = rows[0]
+            first = dict(zip(header, rows[1]))
+            first['score'] = '1'
+            rows[1] = [first[name] for name in header]
+            new = dict(first, id='1000', title_id='1', author='104', score='5')
+            rows.append([new[name] for name in header])
+
+        self.rewrite('review.csv', change_reviews)
+        output = self.import_incremental()
+        self.assertIn('review.csv: добавлено 1, обновлено 1', output)
+        self.assertEqual(Review.objects.get(pk=1).score, 1)
+        title = Title.objects.get(pk=review.title_id)
+        self.assertEqual(
+            title.score_sum,
+            sum(title.reviews.values_list('score', flat=True))
+        )
+
+
+class TestParallelImport(TestCase):
+
+    def test_split_keeps_quoted_newlines_inside_records(self):
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir)
+        path = os.path.join(data_dir, 'review.csv')
+        rows = [['id', 'text']] + [
+            [str(number), f'строка\n"{number}",\nещё'] for number in range(50)
+        ]
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            csv.writer(file).writerows(rows)
+        ranges = split_csv(path, 7)
+        self.assertGreater(len(ranges), 1)
+        parsed = []
+        with open(path, 'rb') as file:
+            for start, end in ranges:
+                file.seek(start)
+                chunk = file.read(end - start).decode('utf-8')
+                parsed.extend(csv.reader(StringIO(chunk, newline='')))
+        self.assertEqual(parsed, rows[1:])
+
+    def test_ranges_load_every_row(self):
+        call_command('import_csv', stdout=StringIO())
+        Comment.objects.all().delete()
+        table = next(
+            table for table in TABLES if table.filename == 'comments.csv'
+        )
+        path = os.path.join(DATA_DIR, table.filename)
+        inserted = sum(
+            load_table(table, path, 5, byte_range=byte_range).inserted
+            for byte_range in split_csv(path, 4)
+        )
+        self.assertEqual(inserted, count_rows('comments.csv'))
+        self.assertEqual(Comment.objects.count(), inserted)
+
+    def test_workers_fall_back_to_one_process_on_sqlite(self):
+        out, err = StringIO(), StringIO()
+        call_command('import_csv', workers=4, stdout=out, stderr=err)
+        self.assertIn('только на PostgreSQL', err.getvalue())
+        self.assertIn('строк/с', out.getvalue())
+        self.assertEqual(Review.objects.count(), count_rows('review.csv'))
@@ -0,0 +1,87 @@
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from io import BytesIO
+
+from api.parsers import OrjsonParser
+from api.renderers import OrjsonRenderer
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+MSK = datetime.timezone(datetime.timedelta(hours=3))
+
+PAYLOAD = OrderedDict([
+    ('name', 'Марсианские хроники'),
+    ('text', 'строка\u2028абзац\u2029'),
+    ('published', datetime.datetime(
+        2023, 5, 1, 12, 30, tzinfo=datetime.timezone.utc
+    )),
+    ('moscow', datetime.datetime(2023, 5, 1, 15, 30, 0, 125, tzinfo=MSK)),
+    ('naive', datetime.datetime(2023, 5, 1, 12, 30)),
+    ('day', datetime.date(2023, 5, 1)),
+    ('time', datetime.time(8, 15)),
+    ('duration', datetime.timedelta(minutes=90)),
+    ('price', Decimal('9.90')),
+    ('id', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+    ('label', gettext_lazy('Ошибка')),
+    ('error', ErrorDetail('Обязательное поле.', code='required')),
+    ('histogram', {1: 0, 10: 3}),
+    ('genre', [{'name': 'Сказка', 'slug': 'tale'}]),
+    ('rating', None),
+    ('huge', 2 ** 70),
+])
+
+
+class TestOrjsonRenderer(SimpleTestCase):
+
+    def test_matches_json_renderer(self):
+        for key, value in PAYLOAD.items():
+            with self.subTest(key):
+                self.assertEqual(
+                    OrjsonRenderer().render({key: value}),
+                    JSONRenderer().render({key: value})
+                )
+        self.assertEqual(
+            OrjsonRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD)
+        )
+
+    def test_indent_matches_json_renderer(self):
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            OrjsonRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type)
+        )
+
+    def test_aware_time_is_rejected(self):
+        with self.assertRaises(ValueError):
+            OrjsonRenderer().render({'time': datetime.time(8, tzinfo=MSK)})
+
+
+class TestOrjsonParser(SimpleTestCase):
+
+    def parse(self, parser, body, encoding='utf-8'):
+        return parser.parse(BytesIO(body), parser_context={
+            'encoding': encoding
+        })
+
+    def test_matches_json_parser(self):
+        body = JSONRenderer().render(PAYLOAD)
+        self.assertEqual(
+            self.parse(OrjsonParser(), body), self.parse(JSONParser(), body)
+        )
+        body = '{"name": "Сказка"}'.encode('cp1251')
+        self.assertEqual(
+            self.parse(OrjsonParser(), body, 'cp1251'), {'name': 'Сказка'}
+        )
+
+    def test_error_matches_json_parser(self):
+        errors = []
+        for parser in (OrjsonParser(), JSONParser()):
+            with self.assertRaises(ParseError) as context:
+                self.parse(parser, b'{"name": ')
+            errors.append(str(context.exception.detail))
+        self.assertEqual(errors[0], errors[1])
@@ -0,0 +1,104 @@
+from django.db import connection
+from django.test import skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.leaderboard import rebuild_leaderboard, sync_title_leaderboard
+from reviews.models import Categories, Genre, LeaderboardEntry, Review, Title
+from users.models import User
+
+
+class TestLeaderboard(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@y.fake')
+            for i in range(3)
+        ]
+        cls.movie = Categories.objects.create(name='Фильм', slug='movie')
+        cls.drama = Genre.objects.create(name='Драма', slug='drama')
+        cls.good = cls.create_title('Хорошее', [9, 10], cls.movie)
+        cls.average = cls.create_title('Среднее', [5, 6, 7])
+        cls.single = cls.create_title('Одиночное', [10], cls.movie)
+
+    @classmethod
+    def create_title(cls, name, scores, category=None):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set([cls.drama])
+        for user, score in zip(cls.users, scores):
+            Review.objects.create(
+                title=title, author=user, text='Текст', score=score
+            )
+        return title
+
+    def ranking(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [entry['title']['id'] for entry in response.data['results']]
+
+    def test_overall_and_min_reviews(self):
+        self.assertEqual(
+            self.ranking('/api/v1/leaderboard/'),
+            [self.single.pk, self.good.pk, self.average.pk]
+        )
+        self.assertEqual(
+            self.ranking('/api/v1/leaderboard/', min_reviews=2),
+            [self.good.pk, self.average.pk]
+        )
+
+    def test_category_and_genre(self):
+        self.assertEqual(
+            self.ranking('/api/v1/leaderboard/categories/movie/'),
+            [self.single.pk, self.good.pk]
+        )
+        self.assertEqual(
+            self.ranking('/api/v1/leaderboard/genres/drama/', min_reviews=3),
+            [self.average.pk]
+        )
+        response = self.client.get('/api/v1/leaderboard/genres/unknown/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_incremental_updates_match_rebuild(self):
+        review = self.single.reviews.get()
+        review.score = 1
+        review.save()
+        self.average.reviews.first().delete()
+        self.good.genre.clear()
+        entries = list(LeaderboardEntry.objects.order_by(
+            'title_id', 'scope', 'scope_id'
+        ).values_list(
+            'title_id', 'scope', 'scope_id', 'review_count', 'average'
+        ))
+        rebuild_leaderboard()
+        self.assertEqual(entries, list(LeaderboardEntry.objects.order_by(
+            'title_id', 'scope', 'scope_id'
+        ).values_list(
+            'title_id', 'scope', 'scope_id', 'review_count', 'average'
+        )))
+
+    def test_title_without_reviews_has_hidden_rows(self):
+        title = Title.objects.create(
+            name='Новое', year=2000, category=self.movie
+        )
+        self.assertEqual(
+            LeaderboardEntry.objects.filter(
+                title=title, review_count=0
+            ).count(),
+            2
+        )
+        self.assertNotIn(title.pk, self.ranking('/api/v1/leaderboard/'))
+        Review.objects.create(
+            title=title, author=self.users[0], text='Текст', score=8
+        )
+        self.assertIn(title.pk, self.ranking('/api/v1/leaderboard/'))
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_sync_locks_title_row(self):
+        with CaptureQueriesContext(connection) as context:
+            sync_title_leaderboard(self.good.pk)
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith('SAVEPOINT')
+        ]
+        self.assertIn('FOR UPDATE', queries[0])
+        self.assertTrue(queries[1].startswith('DELETE'))
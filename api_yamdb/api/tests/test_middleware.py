@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Genre
+from users.models import User
+
+
+class TestApiMiddlewareProfile(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role=User.ADMIN,
+            is_staff=True, is_superuser=True
+        )
+        self.admin.set_password('secret')
+        self.admin.save()
+
+    def test_api_skips_session_csrf_and_messages(self):
+        client = APIClient(enforce_csrf_checks=True)
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}'
+        )
+        response = client.post(
+            '/api/v1/genres/', {'name': 'Рок', 'slug': 'rock'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Genre.objects.filter(slug='rock').exists())
+        request = response.wsgi_request
+        for attribute in ('session', '_messages', 'csrf_processing_done'):
+            self.assertFalse(hasattr(request, attribute), attribute)
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_admin_keeps_session_and_csrf(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.post('/admin/login/', {
+            'username': 'admin', 'password': 'secret'
+        })
+        self.assertEqual(response.status_code, 403)
+        response = client.get('/admin/login/')
+        self.assertIn('csrftoken', response.cookies)
+        response = client.post('/admin/login/', {
+            'username': 'admin', 'password': 'secret',
+            'csrfmiddlewaretoken': response.cookies['csrftoken'].value,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(client.get('/admin/').status_code, 200)
+
+    def test_admin_checks_pass(self):
+        call_command('check', stdout=StringIO())
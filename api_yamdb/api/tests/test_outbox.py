@@ -0,0 +1,225 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail import BadHeaderError
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from users.models import OutgoingEmail, User
+from users.outbox import enqueue_email, purge_emails, queue_stats, send_batch
+
+
+class RejectingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise SMTPException('550 mailbox unavailable')
+
+
+class UnreachableBackend(BaseEmailBackend):
+
+    def open(self):
+        raise ConnectionRefusedError('connection refused')
+
+
+class BadHeaderBackend(BaseEmailBackend):
+    """Не принимает письма на адрес bad@yamdb.fake."""
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if message.to == ['bad@yamdb.fake']:
+                raise BadHeaderError('Header values can\'t contain newlines')
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+class BrokenBackend(BaseEmailBackend):
+    """Отправляет первое письмо, а на втором воркер прерывают."""
+
+    leased_during_send = []
+
+    def send_messages(self, email_messages):
+        leased = OutgoingEmail.objects.filter(
+            next_attempt__gt=timezone.now()
+        ).count()
+        self.leased_during_send.append(leased)
+        if len(mail.outbox) == 1:
+            raise KeyboardInterrupt
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+class TestEmailQueue(APITestCase):
+
+    def test_signup_enqueues_instead_of_sending(self):
+        response = self.client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipient, 'newbie@yamdb.fake')
+        self.assertIn('Код подтверждения', email.body)
+
+    def test_worker_sends_due_emails(self):
+        for number in range(3):
+            enqueue_email('Тема', 'Текст', f'user{number}@yamdb.fake')
+        enqueue_email('Позже', 'Текст', 'later@yamdb.fake')
+        OutgoingEmail.objects.filter(subject='Позже').update(
+            next_attempt=timezone.now() + timedelta(hours=1)
+        )
+        out = StringIO()
+        call_command('send_queued_mail', once=True, batch_size=2, stdout=out)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [f'user{number}@yamdb.fake' for number in range(3)]
+        )
+        self.assertEqual(
+            OutgoingEmail.objects.filter(sent__isnull=False).count(), 3
+        )
+        self.assertIn('В очереди 1 (пора отправить 0)', out.getvalue())
+        self.assertFalse(
+            OutgoingEmail.objects.filter(sent__isnull=False)
+            .exclude(body='').exists()
+        )
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_outbox.RejectingBackend',
+        EMAIL_QUEUE_RETRY_DELAY=10,
+        EMAIL_QUEUE_MAX_ATTEMPTS=2
+    )
+    def test_failed_email_is_retried_with_backoff(self):
+        email = enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        with self.assertLogs('users.outbox', 'WARNING'):
+            self.assertEqual(send_batch(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('550', email.last_error)
+        self.assertGreater(
+            email.next_attempt, timezone.now() + timedelta(seconds=5)
+        )
+        self.assertEqual(send_batch(), (0, 0))
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        with self.assertLogs('users.outbox', 'ERROR'):
+            self.assertEqual(send_batch(), (0, 1))
+        email.refresh_from_db()
+        self.assertIsNone(email.next_attempt)
+        self.assertEqual(email.body, '')
+        self.assertEqual(queue_stats().failed, 1)
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_outbox.UnreachableBackend'
+    )
+    def test_unreachable_server_postpones_whole_batch(self):
+        for number in range(3):
+            enqueue_email('Тема', 'Текст', f'user{number}@yamdb.fake')
+        with self.assertLogs('users.outbox', 'WARNING') as logs:
+            self.assertEqual(send_batch(), (0, 3))
+        self.assertIn('connection refused', logs.output[0])
+        self.assertEqual(queue_stats().pending, 3)
+        self.assertEqual(queue_stats().due, 0)
+
+    def test_stats_report_latency(self):
+        enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        OutgoingEmail.objects.update(
+            created=timezone.now() - timedelta(seconds=30)
+        )
+        send_batch()
+        stats = queue_stats()
+        self.assertEqual(stats.pending, 0)
+        self.assertGreaterEqual(stats.average_latency, timedelta(seconds=30))
+        self.assertEqual(stats.max_latency, stats.average_latency)
+
+    @override_settings(EMAIL_QUEUE_RETENTION=7)
+    def test_purge_removes_only_old_finished_emails(self):
+        now = timezone.now()
+        old = now - timedelta(days=8)
+        for subject in ('Отправлено', 'Снято', 'Ждёт', 'Свежее'):
+            enqueue_email(subject, 'Текст', 'user@yamdb.fake')
+        OutgoingEmail.objects.update(created=old)
+        OutgoingEmail.objects.filter(subject='Отправлено').update(
+            sent=old, next_attempt=None
+        )
+        OutgoingEmail.objects.filter(subject='Снято').update(
+            next_attempt=None
+        )
+        OutgoingEmail.objects.filter(subject='Свежее').update(
+            sent=now, next_attempt=None
+        )
+        self.assertEqual(purge_emails(), 2)
+        self.assertEqual(
+            sorted(OutgoingEmail.objects.values_list('subject', flat=True)),
+            ['Ждёт', 'Свежее']
+        )
+        out = StringIO()
+        OutgoingEmail.objects.update(sent=old)
+        call_command('send_queued_mail', purge=True, stdout=out)
+        self.assertIn('Удалено старых писем: 2', out.getvalue())
+
+    def test_admin_hides_body(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@yamdb.fake', 'secret'
+        )
+        email = enqueue_email('Тема', 'Код 123456', 'user@yamdb.fake')
+        self.client.force_login(admin)
+        response = self.client.get(
+            f'/admin/users/outgoingemail/{email.pk}/change/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, '123456')
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_outbox.BrokenBackend',
+        EMAIL_QUEUE_LEASE=300
+    )
+    def test_sent_emails_are_recorded_when_batch_breaks(self):
+        BrokenBackend.leased_during_send = []
+        for number in range(3):
+            enqueue_email('Тема', 'Текст', f'user{number}@yamdb.fake')
+        with self.assertRaises(KeyboardInterrupt):
+            send_batch()
+        self.assertEqual(BrokenBackend.leased_during_send, [3, 3])
+        self.assertEqual(
+            OutgoingEmail.objects.get(sent__isnull=False).recipient,
+            'user0@yamdb.fake'
+        )
+        self.assertEqual(send_batch(), (0, 0))
+        leased = OutgoingEmail.objects.filter(sent__isnull=True)
+        self.assertEqual(leased.count(), 2)
+        for email in leased:
+            self.assertEqual(email.attempts, 0)
+            self.assertGreater(
+                email.next_attempt, timezone.now() + timedelta(minutes=4)
+            )
+        leased.update(next_attempt=timezone.now())
+        BrokenBackend.leased_during_send = []
+        mail.outbox = []
+        with self.assertRaises(KeyboardInterrupt):
+            send_batch()
+        self.assertEqual(
+            OutgoingEmail.objects.filter(sent__isnull=False).count(), 2
+        )
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.test_outbox.BadHeaderBackend',
+        EMAIL_QUEUE_RETRY_DELAY=10
+    )
+    def test_other_errors_postpone_only_that_email(self):
+        enqueue_email('Тема', 'Текст', 'bad@yamdb.fake')
+        enqueue_email('Тема', 'Текст', 'good@yamdb.fake')
+        with self.assertLogs('users.outbox', 'WARNING') as logs:
+            self.assertEqual(send_batch(), (1, 1))
+        self.assertIn('BadHeaderError', logs.output[0])
+        email = OutgoingEmail.objects.get(recipient='bad@yamdb.fake')
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('BadHeaderError', email.last_error)
+        self.assertLess(
+            email.next_attempt, timezone.now() + timedelta(seconds=11)
+        )
+        self.assertEqual(
+            [message.to for message in mail.outbox], [['good@yamdb.fake']]
+        )
@@ -0,0 +1,40 @@
+from rest_framework.test import APITestCase
+from reviews.models import Review, Title
+from users.models import User
+
+
+class TestCursorPagination(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        for i in range(12):
+            author = User.objects.create(
+                username=f'user{i}', email=f'user{i}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=cls.title, author=author, text='Текст', score=5
+            )
+        cls.url = f'/api/v1/titles/{cls.title.pk}/reviews/'
+
+    def test_page_number_response_unchanged(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            set(response.data), {'count', 'next', 'previous', 'results'}
+        )
+        self.assertEqual(response.data['count'], 12)
+
+    def test_cursor_walks_all_reviews_without_count(self):
+        seen = []
+        response = self.client.get(self.url, {'cursor': ''})
+        while True:
+            self.assertNotIn('count', response.data)
+            seen.extend(review['id'] for review in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(
+            seen,
+            list(self.title.reviews.order_by('pub_date', 'id')
+                 .values_list('id', flat=True))
+        )
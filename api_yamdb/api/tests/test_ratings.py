@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from reviews.models import LeaderboardEntry, Review, Title
+from users.models import User
+
+
+class TestRatingCounters(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@y.fake')
+            for i in range(3)
+        ]
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.other = Title.objects.create(name='Другое', year=2001)
+        for user, score in zip(cls.users[:2], (4, 9)):
+            Review.objects.create(
+                title=cls.title, author=user, text='Текст', score=score
+            )
+        Review.objects.create(
+            title=cls.other, author=cls.users[0], text='Текст', score=2
+        )
+
+    def counters(self, title=None):
+        title = Title.objects.get(pk=(title or self.title).pk)
+        return title.score_sum, title.review_count, title.rating
+
+    def reviews_url(self, review=None):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        return f'{url}{review.pk}/' if review else url
+
+    def test_review_create(self):
+        self.client.force_authenticate(self.users[2])
+        response = self.client.post(
+            self.reviews_url(), {'text': 'Текст', 'score': 5}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(), (18, 3, 6))
+        response = self.client.get(f'/api/v1/titles/{self.title.pk}/')
+        self.assertEqual(response.data['rating'], 6)
+
+    def test_review_update(self):
+        review = Review.objects.get(title=self.title, author=self.users[0])
+        self.client.force_authenticate(self.users[0])
+        response = self.client.patch(self.reviews_url(review), {'score': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(), (19, 2, 9))
+        response = self.client.patch(
+            self.reviews_url(review), {'text': 'Другой текст'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(), (19, 2, 9))
+
+    def test_review_delete(self):
+        review = Review.objects.get(title=self.title, author=self.users[1])
+        self.client.force_authenticate(self.users[1])
+        response = self.client.delete(self.reviews_url(review))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.counters(), (4, 1, 4))
+        Review.objects.filter(title=self.title).delete()
+        self.assertEqual(self.counters(), (0, 0, None))
+
+    def test_author_delete_cascades_to_counters(self):
+        self.users[0].delete()
+        self.assertEqual(self.counters(), (9, 1, 9))
+        self.assertEqual(self.counters(self.other), (0, 0, None))
+
+    def test_title_delete_cascades_without_errors(self):
+        self.title.delete()
+        self.assertFalse(
+            Review.objects.filter(title_id=self.title.pk).exists()
+        )
+        self.assertEqual(self.counters(self.other), (2, 1, 2))
+
+    def test_rebuild_ratings_repairs_drift(self):
+        Title.objects.update(score_sum=100, review_count=1, score_count_4=5)
+        out = StringIO()
+        call_command('rebuild_ratings', stdout=out)
+        self.assertIn('Рейтинг пересчитан: 2 произведений', out.getvalue())
+        self.assertEqual(self.counters(), (13, 2, 6))
+        self.assertEqual(self.counters(self.other), (2, 1, 2))
+        self.assertEqual(Title.objects.get(pk=self.title.pk).score_count_4, 1)
+
+    def test_title_edit_keeps_counters_changed_meanwhile(self):
+        stale = Title.objects.get(pk=self.title.pk)
+        Review.objects.create(
+            title=self.title, author=self.users[2], text='Текст', score=9
+        )
+        stale.name = 'Новое название'
+        stale.save()
+        title = Title.objects.get(pk=self.title.pk)
+        self.assertEqual(title.name, 'Новое название')
+        self.assertEqual(self.counters(), (22, 3, 7))
+        self.assertEqual(title.score_count_9, 2)
+        entry = LeaderboardEntry.objects.get(
+            title=self.title, scope=LeaderboardEntry.ALL
+        )
+        self.assertEqual((entry.score_sum, entry.review_count), (22, 3))
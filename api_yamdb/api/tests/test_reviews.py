@@ -0,0 +1,186 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO')
+
+
+class TestReviewQueries(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@y.fake')
+            for i in range(12)
+        ]
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.reviews = [
+            Review.objects.create(
+                title=cls.title, author=user, text='Текст', score=5
+            )
+            for user in cls.users[:10]
+        ]
+        cls.review = cls.reviews[0]
+        for user in cls.users[:10]:
+            Comment.objects.create(
+                review=cls.review, author=user, text='Комментарий'
+            )
+
+    @contextmanager
+    def assert_data_queries(self, number):
+        """Как assertNumQueries, но без управления точками сохранения."""
+        with CaptureQueriesContext(connection) as context:
+            yield
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(TRANSACTION_STATEMENTS)
+        ]
+        self.assertLessEqual(len(queries), number, '\n'.join(queries))
+
+    def reviews_url(self, title_id=None):
+        return f'/api/v1/titles/{title_id or self.title.pk}/reviews/'
+
+    def comments_url(self, review_id=None):
+        return (f'{self.reviews_url()}'
+                f'{review_id or self.review.pk}/comments/')
+
+    def test_review_list(self):
+        with self.assert_data_queries(2):
+            response = self.client.get(self.reviews_url())
+        self.assertEqual(response.data['count'], 10)
+        self.assertEqual(len(response.data['results']), 5)
+        with self.assert_data_queries(2):
+            response = self.client.get(self.reviews_url(), {'cursor': ''})
+        self.assertEqual(len(response.data['results']), 5)
+        response = self.client.get(self.reviews_url(999))
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_list(self):
+        with self.assert_data_queries(2):
+            response = self.client.get(self.comments_url())
+        self.assertEqual(response.data['count'], 10)
+        response = self.client.get(self.comments_url(999))
+        self.assertEqual(response.status_code, 404)
+        other = Title.objects.create(name='Другое', year=2000)
+        response = self.client.get(
+            f'/api/v1/titles/{other.pk}/reviews/{self.review.pk}/comments/'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_review_create(self):
+        self.client.force_authenticate(self.users[10])
+        data = {'text': 'Новый', 'score': 7}
+        with self.assert_data_queries(3):
+            response = self.client.post(self.reviews_url(), data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['author'], 'user10')
+        self.assertEqual(
+            Title.objects.get(pk=self.title.pk).review_count, 11
+        )
+
+        response = self.client.post(self.reviews_url(), data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['non_field_errors'],
+            ['Вы уже оставили отзыв на это произведение']
+        )
+
+    def test_review_create_reraises_other_integrity_errors(self):
+        self.client.force_authenticate(self.users[10])
+        error = IntegrityError('CHECK constraint failed: score')
+        with mock.patch.object(Review, 'save', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.client.post(
+                    self.reviews_url(), {'text': 'Текст', 'score': 7}
+                )
+
+    def test_review_create_for_missing_title(self):
+        self.client.force_authenticate(self.users[10])
+        response = self.client.post(
+            self.reviews_url(999), {'text': 'Текст', 'score': 7}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Review.objects.filter(title_id=999).exists())
+
+    def test_comment_create(self):
+        self.client.force_authenticate(self.users[11])
+        with self.assert_data_queries(3):
+            response = self.client.post(self.comments_url(), {'text': 'Новый'})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            self.comments_url(999), {'text': 'Новый'}
+        )
+        self.assertEqual(response.status_code, 404)
+        other = Title.objects.create(name='Другое', year=2000)
+        response = self.client.post(
+            f'/api/v1/titles/{other.pk}/reviews/{self.review.pk}/comments/',
+            {'text': 'Чужой'}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.filter(text='Чужой').exists())
+
+
+class TestEmbeddedComments(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@y.fake')
+            for i in range(6)
+        ]
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.reviews = [
+            Review.objects.create(
+                title=cls.title, author=user, text='Текст', score=5
+            )
+            for user in users
+        ]
+        for count, review in enumerate(cls.reviews[:3]):
+            for i in range(count * 2):
+                Comment.objects.create(
+                    review=review, author=users[i], text=f'Комментарий {i}'
+                )
+        cls.url = f'/api/v1/titles/{cls.title.pk}/reviews/'
+
+    def test_list_embeds_latest_comments_in_one_query(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                self.url, {'include': 'comments', 'comments_limit': 3}
+            )
+        results = response.data['results']
+        self.assertEqual(
+            [review['comment_count'] for review in results], [0, 2, 4, 0, 0]
+        )
+        self.assertEqual(
+            [comment['text'] for comment in results[2]['comments']],
+            ['Комментарий 3', 'Комментарий 2', 'Комментарий 1']
+        )
+        self.assertEqual(results[2]['comments'][0]['author'], 'user3')
+
+    def test_without_include_and_on_detail(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('comments', response.data['results'][0])
+        response = self.client.get(
+            f'{self.url}{self.reviews[1].pk}/', {'include': 'comments'}
+        )
+        self.assertEqual(response.data['comment_count'], 2)
+        self.assertEqual(len(response.data['comments']), 2)
+        response = self.client.get(
+            self.url, {'include': 'comments', 'comments_limit': 'много'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_comment_changes_list_etag(self):
+        params = {'include': 'comments'}
+        etag = self.client.get(self.url, params)['ETag']
+        Comment.objects.create(
+            review=self.reviews[0], author=self.reviews[0].author, text='Ещё'
+        )
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,94 @@
+from unittest import mock
+
+from api.serializers import SignUpSerializer
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from users.models import OutgoingEmail, User
+
+from .test_reviews import TRANSACTION_STATEMENTS
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+class TestSignUp(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='existing', email='existing@yamdb.fake'
+        )
+
+    def signup(self, username, email):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                SIGNUP_URL, {'username': username, 'email': email}
+            )
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(TRANSACTION_STATEMENTS)
+        ]
+        return response, queries
+
+    def test_new_user_costs_one_lookup_and_one_insert(self):
+        response, queries = self.signup('newbie', 'newbie@yamdb.fake')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data, {'username': 'newbie', 'email': 'newbie@yamdb.fake'}
+        )
+        self.assertEqual(len(queries), 3, '\n'.join(queries))
+        self.assertTrue(User.objects.filter(username='newbie').exists())
+
+    def test_repeated_signup_resends_code(self):
+        response, queries = self.signup('existing', 'existing@yamdb.fake')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 2, '\n'.join(queries))
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_taken_username_or_email_is_rejected(self):
+        response, _ = self.signup('existing', 'other@yamdb.fake')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['non_field_errors'],
+            ['Пользователь с таким username уже существует!']
+        )
+        response, _ = self.signup('other', 'existing@yamdb.fake')
+        self.assertEqual(
+            response.data['non_field_errors'],
+            ['Пользователь с таким email уже существует!']
+        )
+
+    def test_concurrent_signup_is_caught_by_unique_index(self):
+        find_user = SignUpSerializer.find_user
+        lookups = []
+
+        def racing_find_user(serializer, data):
+            lookups.append(data)
+            if len(lookups) > 1:
+                return find_user(serializer, data)
+            # Параллельный запрос занимает username после проверки.
+            User.objects.create(username='racer', email='first@yamdb.fake')
+            return None
+
+        with mock.patch.object(
+            SignUpSerializer, 'find_user', racing_find_user
+        ):
+            response = self.client.post(
+                SIGNUP_URL, {'username': 'racer', 'email': 'racer@yamdb.fake'}
+            )
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            'non_field_errors': [
+                'Пользователь с таким username уже существует!'
+            ]
+        })
+
+    def test_concurrent_identical_signup_returns_same_user(self):
+        serializer = SignUpSerializer(
+            data={'username': 'twin', 'email': 'twin@yamdb.fake'}
+        )
+        self.assertTrue(serializer.is_valid())
+        user = User.objects.create(username='twin', email='twin@yamdb.fake')
+        self.assertEqual(serializer.save(), user)
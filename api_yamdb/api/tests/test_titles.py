@@ -0,0 +1,162 @@
+from unittest import skipUnless
+
+from django.db import connection
+from rest_framework.test import APITestCase
+from reviews.models import Categories, Genre, Title
+from reviews.search import search_rank, search_titles
+
+
+class TestTitleQueries(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Categories.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        for i in range(20):
+            title = Title.objects.create(
+                name=f'Произведение {i}', year=2000, category=category
+            )
+            title.genre.set(genres)
+
+    def test_list_queries(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/titles/')
+        self.assertEqual(len(response.data['results'][0]['genre']), 3)
+
+    def test_filtered_list_queries(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                '/api/v1/titles/', {'genre': 'genre-1', 'category': 'movie'}
+            )
+        self.assertEqual(response.data['count'], 20)
+
+    def test_detail_queries(self):
+        title = Title.objects.first()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/v1/titles/{title.pk}/')
+        self.assertEqual(response.data['category']['slug'], 'movie')
+
+
+class TestTitleSearch(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.godfather = Title.objects.create(
+            name='Крестный отец', year=1972, description='Семейная сага'
+        )
+        cls.saga = Title.objects.create(
+            name='Сага о Форсайтах', year=1922, description='Роман'
+        )
+        Title.objects.create(name='Отцы и дети', year=1862)
+
+    def search(self, query):
+        response = self.client.get('/api/v1/titles/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [title['id'] for title in response.data['results']]
+
+    def test_search_matches_whole_words_in_any_case(self):
+        self.assertEqual(self.search('ОТЕЦ'), [self.godfather.pk])
+
+    def test_search_requires_every_word(self):
+        self.assertEqual(self.search('отец сага'), [self.godfather.pk])
+
+    def test_name_match_ranks_above_description_match(self):
+        self.assertEqual(
+            self.search('сага'), [self.saga.pk, self.godfather.pk]
+        )
+
+
+@skipUnless(
+    connection.vendor == 'postgresql', 'search_vector есть только в PostgreSQL'
+)
+class TestPostgresTitleSearch(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.titles = [
+            Title.objects.create(name=name, year=2000, description=text)
+            for name, text in (
+                ('Крестный отец', 'Семейная сага'),
+                ('Сага о Форсайтах', 'Роман-сага'),
+                ('Отцы и дети', None),
+                ('Научно-фантастический фильм', 'Сага о звёздах'),
+                ('Star Wars', 'Космическая сага, эпизод 4'),
+            )
+        ]
+
+    def search(self, query):
+        return list(
+            search_titles(Title.objects.all(), query)
+            .values_list('id', flat=True)
+        )
+
+    def test_matches_same_titles_as_sqlite_rules(self):
+        for query in ('сага', 'ОТЕЦ', 'отец сага', 'фантастический',
+                      'научно фантастический', 'star', 'эпизод 4', 'вой'):
+            with self.subTest(query):
+                self.assertEqual(set(self.search(query)), {
+                    title.pk for title in self.titles
+                    if search_rank(title.name, title.description, query)
+                })
+
+    def test_name_match_ranks_above_description_match(self):
+        godfather, forsyte, _, scifi, star_wars = self.titles
+        ranked = self.search('сага')
+        self.assertEqual(ranked[0], forsyte.pk)
+        self.assertEqual(
+            set(ranked[1:]), {godfather.pk, scifi.pk, star_wars.pk}
+        )
+
+
+class TestTitleFilters(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        movie = Categories.objects.create(name='Фильм', slug='movie')
+        book = Categories.objects.create(name='Книга', slug='book')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        melodrama = Genre.objects.create(name='Мелодрама', slug='melodrama')
+        cls.drama = Title.objects.create(
+            name='Драма', year=1990, category=movie
+        )
+        cls.drama.genre.set([drama])
+        cls.dramedy = Title.objects.create(
+            name='Драмеди', year=2000, category=book
+        )
+        cls.dramedy.genre.set([drama, comedy])
+        cls.melodrama = Title.objects.create(name='Мелодрама', year=2010)
+        cls.melodrama.genre.set([melodrama])
+
+    def filter(self, **params):
+        response = self.client.get('/api/v1/titles/', params)
+        self.assertEqual(response.status_code, 200)
+        return {title['id'] for title in response.data['results']}
+
+    def test_genre_is_exact(self):
+        self.assertEqual(
+            self.filter(genre='drama'), {self.drama.pk, self.dramedy.pk}
+        )
+
+    def test_genre_any_and_all(self):
+        self.assertEqual(
+            self.filter(genre='comedy,melodrama'),
+            {self.dramedy.pk, self.melodrama.pk}
+        )
+        self.assertEqual(
+            self.filter(genre='drama,comedy', genre_match='all'),
+            {self.dramedy.pk}
+        )
+
+    def test_category_in_and_year_range(self):
+        self.assertEqual(
+            self.filter(category__in='movie,book'),
+            {self.drama.pk, self.dramedy.pk}
+        )
+        self.assertEqual(
+            self.filter(year_min=1995, year_max=2010),
+            {self.dramedy.pk, self.melodrama.pk}
+        )
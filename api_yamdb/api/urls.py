@@ -1,10 +1,17 @@
 """URL-ы приложения api."""
 
-from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, SignUpView, TitleViewSet,
-                       TokenObtainView, UserViewSet)
+from api.async_views import pooled_urls
+from api.views import (CategoryViewSet, CommentViewSet, ExportView,
+                       GenreViewSet, LeaderboardView, ReviewViewSet,
+                       SignUpView, TitleViewSet, TokenObtainView, UserViewSet)
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
+from reviews.models import LeaderboardEntry
+
+CATALOG_VIEWSETS = (
+    TitleViewSet, GenreViewSet, CategoryViewSet, ReviewViewSet, CommentViewSet
+)
 
 router_v1 = DefaultRouter()
 router_v1.register('titles', TitleViewSet)
@@ -26,8 +33,28 @@ router_v1.register(
     basename='users'
 )
 
+router_urls = router_v1.urls
+if settings.API_ASYNC_CATALOG:
+    router_urls = pooled_urls(router_urls, CATALOG_VIEWSETS)
+
 urlpatterns = [
     path('v1/auth/signup/', SignUpView.as_view()),
     path('v1/auth/token/', TokenObtainView.as_view()),
-    path('v1/', include(router_v1.urls)),
+    path('v1/leaderboard/', LeaderboardView.as_view()),
+    path(
+        'v1/leaderboard/categories/<slug:slug>/',
+        LeaderboardView.as_view(scope=LeaderboardEntry.CATEGORY)
+    ),
+    path(
+        'v1/leaderboard/genres/<slug:slug>/',
+        LeaderboardView.as_view(scope=LeaderboardEntry.GENRE)
+    ),
+    path('v1/export/users/', ExportView.as_view(kind='users')),
+    path('v1/export/categories/', ExportView.as_view(kind='categories')),
+    path('v1/export/genres/', ExportView.as_view(kind='genres')),
+    path('v1/export/titles/', ExportView.as_view(kind='titles')),
+    path('v1/export/genre_title/', ExportView.as_view(kind='genre_title')),
+    path('v1/export/reviews/', ExportView.as_view(kind='reviews')),
+    path('v1/export/comments/', ExportView.as_view(kind='comments')),
+    path('v1/', include(router_urls)),
 ]
@@ -1,12 +1,17 @@
 """
 Вьюшки приложения api.
 
-send_confirmation_code -- Отправка кода подтверждения пользователю.
+send_confirmation_code -- Постановка письма с кодом подтверждения
+                          в очередь.
+violates_constraint    -- Проверка, что ошибка вызвана ограничением модели.
 SignUpView      -- Вьюсет для регистрации пользователя.
 TokenObtainView -- Вьюсет для получения токена по коду подтверждения.
 UserViewSet     -- Вьюсет для управления пользователями приложения.
                 -- Получение и изменение данных пользователя и его удаление.
 TitleViewSet    -- Вьюсет для модели Title.
+LeaderboardView -- Лучшие произведения: общий рейтинг, по категории
+                   или по жанру.
+ExportView      -- Потоковая выгрузка таблицы в NDJSON или CSV.
 CategoryViewSet -- Вьюсет для модели Category.
 GenreViewSet    -- Вьюсет для модели Genre.
 ReviewViewSet   -- Вьюсет для модели Review.
@@ -17,41 +22,79 @@ CommentViewSet  -- Вьюсет для модели Comment.
 from api.permissions import IsAdmin
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Categories, Genre, Review, Title
+from reviews.export import EXPORTS, OUTPUTS, parse_updated_since, stream_export
+from reviews.models import (Categories, Comment, Genre, LeaderboardEntry,
+                            Review, Title)
+from reviews.threads import comment_count_subquery, latest_comments
 from users.models import User
+from users.outbox import enqueue_email
 
+from .authentication import access_token_for
+from .cache import CachedListMixin, get_version
+from .conditional import ConditionalGetMixin
 from .filters import TitleFilter
+from .pagination import PageNumberOrCursorPagination
 from .permissions import (IsAdminOrReadOnly,
                           IsAuthorOrIsModeratorOrAdminOrReadOnly)
 from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer, SignUpSerializer,
-                          TitleSerializer, TitleWriteSerializer,
-                          TokenSerializer, UserMeSerializer, UserSerializer)
+                          GenreSerializer, LeaderboardEntrySerializer,
+                          ReviewSerializer, SignUpSerializer,
+                          TitleBulkSerializer, TitleSerializer,
+                          TitleWriteSerializer, TokenSerializer,
+                          UserMeSerializer, UserSerializer, get_includes)
 
 
 def send_confirmation_code(user):
-    """Функция отправки кода подтверждения на почту."""
+    """
+    Ставит письмо с кодом подтверждения в очередь.
+
+    Письмо отправляет команда send_queued_mail, запрос не ждёт
+    почтовый сервер.
+    """
     confirmation_code = default_token_generator.make_token(user)
-    return send_mail(
+    return enqueue_email(
         subject=settings.EMAIL_SUBJECT,
-        message=f'Код подтверждения: {confirmation_code}',
-        from_email=settings.EMAIL_ADMIN,
-        recipient_list=[user.email]
+        body=f'Код подтверждения: {confirmation_code}',
+        recipient=user.email,
+        from_email=settings.EMAIL_ADMIN
     )
 
 
+def violates_constraint(error, model, name):
+    """
+    Проверяет, что IntegrityError вызвано ограничением name модели.
+
+    PostgreSQL сообщает имя ограничения, SQLite -- только столбцы
+    уникального ключа, поэтому сверяются они.
+    """
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None:
+        return diag.constraint_name == name
+    constraint = next(
+        constraint for constraint in model._meta.constraints
+        if constraint.name == name
+    )
+    columns = ', '.join(
+        f'{model._meta.db_table}.{model._meta.get_field(field).column}'
+        for field in constraint.fields
+    )
+    return str(error) == f'UNIQUE constraint failed: {columns}'
+
+
 class SignUpView(generics.CreateAPIView):
     """Регистрация нового пользователя по username и email."""
 
@@ -63,12 +106,7 @@ class SignUpView(generics.CreateAPIView):
         """Обработка POST запроса с данными пользователя."""
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        username = serializer.data.get('username')
-        email = serializer.data.get('email')
-        user, created = User.objects.get_or_create(
-            username=username,
-            email=email
-        )
+        user = serializer.save()
         send_confirmation_code(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -88,7 +126,7 @@ class TokenObtainView(generics.CreateAPIView):
         confirmation_code = serializer.data.get('confirmation_code')
         user = get_object_or_404(User, username=username)
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
+            token = access_token_for(user)
             return Response({'token': f'{token}'}, status.HTTP_200_OK)
         return Response(
             {'message': 'Неверный код подтверждения.'},
@@ -128,34 +166,44 @@ class UserViewSet(viewsets.ModelViewSet):
         -- Изменение данных своей учетной записи.
 
         """
+        user = self.request.user
+        if user.get_deferred_fields() - {'password'}:
+            # Пользователь из токена с ролями: профиль читается целиком.
+            user = User.objects.get(pk=user.pk)
         if request.method == 'PATCH':
             serializer = UserMeSerializer(
-                self.request.user,
+                user,
                 data=request.data,
                 partial=True
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
-        serializer = UserMeSerializer(self.request.user)
+        serializer = UserMeSerializer(user)
         return Response(serializer.data)
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, ModelViewSet):
     """
     Вьюсет для модели Title.
 
     get_serializer_class -- Возвращает сериализатор
                             в зависимости от метода.
+    get_last_modified    -- Возвращает время изменения произведения.
+    get_etag_parts       -- Добавляет в ETag версии жанров и категорий.
+    histogram            -- Возвращает распределение оценок произведения.
+    bulk                 -- Создаёт пачку произведений одним запросом.
     """
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all()
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
 
     serializer_class = TitleSerializer
     permission_classes = [IsAdminOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('id',)
+    conditional_actions = ('retrieve',)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
 
@@ -163,13 +211,154 @@ class TitleViewSet(ModelViewSet):
         """Возвращает сериализатор в зависимости от метода."""
         if self.action in ('list', 'retrieve'):
             return TitleSerializer
+        if self.action == 'bulk':
+            return TitleBulkSerializer
         return TitleWriteSerializer
 
+    def get_last_modified(self):
+        """Возвращает время изменения произведения."""
+        return Title.objects.filter(pk=self.kwargs['pk']).values_list(
+            'modified', flat=True
+        ).first()
+
+    def get_etag_parts(self):
+        """Добавляет в ETag версии жанров и категорий."""
+        return (get_version(Genre._meta.label_lower),
+                get_version(Categories._meta.label_lower))
+
+    @action(detail=True, methods=('get',))
+    def histogram(self, request, pk=None):
+        """
+        Возвращает распределение оценок произведения.
+
+        Читает хранимые счётчики произведения, отзывы не сканируются.
+        """
+        title = get_object_or_404(
+            Title.objects.only(
+                'score_sum', 'review_count', *Title.HISTOGRAM_FIELDS
+            ),
+            pk=pk
+        )
+        return Response({
+            'rating': title.rating,
+            'review_count': title.review_count,
+            'histogram': title.histogram,
+        })
+
+    @action(detail=False, methods=('post',))
+    def bulk(self, request):
+        """
+        Создаёт пачку произведений одним запросом.
+
+        Принимает список произведений в формате POST /titles/,
+        возвращает id созданных произведений в порядке запроса
+        или ошибки по позициям элементов.
+        """
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save()
+        return Response(
+            {'created': len(titles), 'ids': [title.pk for title in titles]},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class LeaderboardView(generics.ListAPIView):
+    """
+    Лучшие произведения: общий рейтинг, по категории или по жанру.
+
+    Читает рейтинговую таблицу по индексу без агрегации отзывов.
+    Параметр min_reviews отсекает произведения с малым числом отзывов.
+
+    get_scope    -- Возвращает вид рейтинга и id категории или жанра.
+    get_queryset -- Возвращает строки рейтинга по убыванию оценки.
+    """
+
+    serializer_class = LeaderboardEntrySerializer
+    permission_classes = (AllowAny,)
+    scope = LeaderboardEntry.ALL
+    scope_models = {
+        LeaderboardEntry.CATEGORY: Categories,
+        LeaderboardEntry.GENRE: Genre,
+    }
+
+    def get_scope(self):
+        """Возвращает вид рейтинга и id категории или жанра."""
+        if self.scope == LeaderboardEntry.ALL:
+            return self.scope, 0
+        scope_object = get_object_or_404(
+            self.scope_models[self.scope], slug=self.kwargs['slug']
+        )
+        return self.scope, scope_object.pk
+
+    def get_queryset(self):
+        """Возвращает строки рейтинга по убыванию оценки."""
+        try:
+            min_reviews = max(
+                int(self.request.query_params.get('min_reviews', 1)), 1
+            )
+        except ValueError:
+            raise ValidationError(
+                {'min_reviews': 'Укажите целое число отзывов.'}
+            )
+        scope, scope_id = self.get_scope()
+        return LeaderboardEntry.objects.filter(
+            scope=scope,
+            scope_id=scope_id,
+            review_count__gte=min_reviews
+        ).order_by(
+            '-average', '-review_count', 'title_id'
+        ).select_related(
+            'title__category'
+        ).prefetch_related('title__genre')
+
+
+class ExportView(APIView):
+    """
+    Потоковая выгрузка таблицы в NDJSON или CSV.
 
-class GenreReviewViewSet(ModelViewSet):
+    Параметры запроса: output (ndjson или csv) и updated_since
+    (дата или дата и время в ISO 8601). Ответ отдаётся по мере
+    чтения строк из базы, CSV совпадает с форматом import_csv.
+
+    get -- Возвращает потоковый ответ с выгрузкой.
+    """
+
+    permission_classes = (IsAdmin,)
+    kind = 'titles'
+
+    def get(self, request):
+        """Возвращает потоковый ответ с выгрузкой."""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in OUTPUTS:
+            raise ValidationError(
+                {'output': f'Допустимые форматы: {", ".join(OUTPUTS)}.'}
+            )
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = parse_updated_since(updated_since)
+            except ValueError:
+                raise ValidationError(
+                    {'updated_since': 'Укажите дату в формате ISO 8601.'}
+                )
+        response = StreamingHttpResponse(
+            stream_export(self.kind, output, updated_since or None),
+            content_type=OUTPUTS[output]
+        )
+        filename = EXPORTS[self.kind].filename.replace('.csv', f'.{output}')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
+
+
+class GenreReviewViewSet(CachedListMixin, ModelViewSet):
     """
     Базовый класс для моделей Category и Genre.
 
+    Списки кэшируются до следующего изменения модели.
+
     retrieve -- Возвращает ответ со статусом 405 по методу GET.
     update   -- Возвращает ответ со статусом 405 по методу PUT.
     """
@@ -205,65 +394,207 @@ class GenreViewSet(GenreReviewViewSet):
     serializer_class = GenreSerializer
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, ModelViewSet):
     """
     Вьюсет для модели Review.
 
-    get_queryset   -- Возвращает queryset отзывов по id произведения.
-    perform_create -- Осуществляет создание нового отзыва.
+    Страница отзывов стоит два запроса: произведение (проверка
+    существования, отметка изменения и хранимое число отзывов
+    для пагинации) и сами отзывы с авторами. С параметром
+    include=comments к отзывам добавляется число комментариев,
+    а последние comments_limit комментариев всех отзывов страницы
+    читаются третьим запросом.
+
+    include_comments    -- Проверяет, запрошены ли комментарии к отзывам.
+    get_comments_limit  -- Возвращает число комментариев на отзыв.
+    embed_comments      -- Добавляет отзывам последние комментарии.
+    get_parent          -- Возвращает произведение из адреса или 404.
+    get_last_modified   -- Возвращает время изменения отзывов произведения.
+    get_paginator_count -- Возвращает хранимое число отзывов произведения.
+    get_queryset        -- Возвращает queryset отзывов по id произведения.
+    paginate_queryset   -- Добавляет комментарии к отзывам страницы.
+    get_object          -- Добавляет комментарии к отзыву.
+    perform_create      -- Осуществляет создание нового отзыва.
     """
 
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthorOrIsModeratorOrAdminOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('pub_date', 'id')
+    conditional_actions = ('list',)
     http_method_names = ('get', 'post', 'patch', 'delete')
+    parent = None
+    default_comments_limit = 3
+    max_comments_limit = 20
+
+    def include_comments(self):
+        """Проверяет, запрошены ли комментарии к отзывам."""
+        return (self.action in ('list', 'retrieve')
+                and 'comments' in get_includes(self.request))
+
+    def get_comments_limit(self):
+        """Возвращает число комментариев на отзыв."""
+        try:
+            limit = int(self.request.query_params.get(
+                'comments_limit', self.default_comments_limit
+            ))
+        except ValueError:
+            raise ValidationError(
+                {'comments_limit': 'Укажите целое число комментариев.'}
+            )
+        return min(max(limit, 0), self.max_comments_limit)
+
+    def embed_comments(self, reviews):
+        """Добавляет отзывам последние комментарии."""
+        comments = latest_comments(
+            (review.pk for review in reviews), self.get_comments_limit()
+        )
+        for review in reviews:
+            review.latest_comments = comments.get(review.pk, [])
+        return reviews
+
+    def get_parent(self):
+        """
+        Возвращает произведение из адреса или 404.
+
+        С комментариями заодно читается время последнего изменения
+        отзывов: комментарии обновляют его у отзыва, а не у произведения.
+        """
+        if self.parent is None:
+            queryset = Title.objects.only('modified', 'review_count')
+            if self.include_comments():
+                queryset = queryset.annotate(
+                    reviews_modified=Max('reviews__modified')
+                )
+            self.parent = get_object_or_404(
+                queryset, pk=self.kwargs['title_id']
+            )
+        return self.parent
+
+    def get_last_modified(self):
+        """Возвращает время изменения отзывов произведения."""
+        parent = self.get_parent()
+        reviews_modified = getattr(parent, 'reviews_modified', None)
+        if reviews_modified is None:
+            return parent.modified
+        return max(parent.modified, reviews_modified)
+
+    def get_paginator_count(self):
+        """Возвращает хранимое число отзывов произведения."""
+        return self.get_parent().review_count
 
     def get_queryset(self):
         """Возвращает queryset отзывов по id произведения."""
-        title_id = self.kwargs['title_id']
-        title = get_object_or_404(Title, id=title_id)
-        return title.reviews.all()
+        queryset = Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author').order_by('pub_date', 'id')
+        if not self.include_comments():
+            return queryset
+        return queryset.annotate(comment_count=comment_count_subquery())
+
+    def paginate_queryset(self, queryset):
+        """Добавляет комментарии к отзывам страницы."""
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.include_comments():
+            self.embed_comments(page)
+        return page
+
+    def get_object(self):
+        """Добавляет комментарии к отзыву."""
+        if not self.include_comments():
+            return super().get_object()
+        return self.embed_comments([super().get_object()])[0]
 
     def perform_create(self, serializer):
         """
         Осуществляет создание нового отзыва.
 
         Добавляет пользователя, отправившего запрос,
-        в поле автора отзыва.
+        в поле автора отзыва. Существование произведения
+        проверяет обновление его счётчиков, повторный отзыв
+        отсекает ограничение unique_review.
         """
-        title_id = self.kwargs['title_id']
-        serializer.save(
-            author=self.request.user,
-            title=get_object_or_404(Title, id=title_id)
-        )
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    author=self.request.user,
+                    title_id=self.kwargs['title_id']
+                )
+        except Title.DoesNotExist:
+            raise Http404
+        except IntegrityError as error:
+            if not violates_constraint(error, Review, 'unique_review'):
+                raise
+            raise ValidationError(
+                {'non_field_errors': [
+                    'Вы уже оставили отзыв на это произведение'
+                ]}
+            )
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, ModelViewSet):
     """
     Вьюсет для модели Comment.
 
-    get_queryset   -- Возвращает queryset комментариев по отзыву.
-    perform_create -- Осуществляет создание нового комментария.
+    Страница комментариев стоит два запроса: отзыв с числом
+    комментариев и сами комментарии с авторами.
+
+    get_parent          -- Возвращает отзыв из адреса или 404.
+    get_last_modified   -- Возвращает время изменения комментариев отзыва.
+    get_paginator_count -- Возвращает число комментариев отзыва.
+    get_queryset        -- Возвращает queryset комментариев по отзыву.
+    perform_create      -- Осуществляет создание нового комментария.
     """
 
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorOrIsModeratorOrAdminOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('pub_date', 'id')
+    conditional_actions = ('list',)
     http_method_names = ('get', 'post', 'patch', 'delete')
+    parent = None
+
+    def get_parent(self):
+        """Возвращает отзыв из адреса или 404."""
+        if self.parent is None:
+            self.parent = get_object_or_404(
+                Review.objects.filter(
+                    pk=self.kwargs['review_id'],
+                    title_id=self.kwargs['title_id']
+                ).annotate(comment_count=Count('comments')).values(
+                    'modified', 'comment_count'
+                )
+            )
+        return self.parent
+
+    def get_last_modified(self):
+        """Возвращает время изменения комментариев отзыва."""
+        return self.get_parent()['modified']
+
+    def get_paginator_count(self):
+        """Возвращает число комментариев отзыва."""
+        return self.get_parent()['comment_count']
 
     def get_queryset(self):
         """Возвращает queryset комментариев по отзыву."""
-        review_id = self.kwargs['review_id']
-        review = get_object_or_404(Review, id=review_id)
-        return review.comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id']
+        ).select_related('author').order_by('pub_date', 'id')
 
     def perform_create(self, serializer):
         """
         Осуществляет создание нового комментария.
 
         Добавляет пользователя, отправившего запрос,
-        в поле автора комментария.
+        в поле автора комментария. Существование отзыва к этому
+        произведению проверяет обновление времени изменения отзыва.
         """
-        review_id = self.kwargs['review_id']
-        review = get_object_or_404(Review, id=review_id)
-        serializer.save(author=self.request.user, review=review)
+        review = Review(
+            pk=self.kwargs['review_id'], title_id=self.kwargs['title_id']
+        )
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, review=review)
+        except Review.DoesNotExist:
+            raise Http404
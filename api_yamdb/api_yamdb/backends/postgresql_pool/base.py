@@ -0,0 +1,71 @@
+"""
+Бэкенд PostgreSQL с проверкой подключений и пулом.
+
+Включается через DB_ENGINE=api_yamdb.backends.postgresql_pool.
+
+С CONN_HEALTH_CHECKS подключение, переживающее запрос
+(CONN_MAX_AGE), проверяется перед первым обращением к базе
+в следующем запросе, и разорванное подключение открывается
+заново вместо ошибки в запросе.
+
+С POOL['SIZE'] > 0 подключения берутся из пула процесса
+(pool.ConnectionPool) и возвращаются в него вместо закрытия.
+
+DatabaseWrapper -- Подключение PostgreSQL с проверкой и пулом.
+"""
+
+from functools import partial
+
+from django.db.backends.postgresql import base
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Подключение PostgreSQL с проверкой и пулом.
+
+    get_new_connection           -- Берёт подключение из пула или
+                                    открывает новое.
+    close_if_unusable_or_obsolete -- Закрывает устаревшее подключение
+                                    и назначает проверку.
+    ensure_connection            -- Проверяет подключение перед первым
+                                    обращением в запросе.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool = get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        """Берёт подключение из пула или открывает новое."""
+        connect = partial(super().get_new_connection, conn_params)
+        self.health_check_done = True
+        if self.pool is None:
+            return connect()
+        return self.pool.acquire(connect)
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            return self.pool.release(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        """Закрывает устаревшее подключение и назначает проверку."""
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        """Проверяет подключение перед первым обращением в запросе."""
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and not self.in_atomic_block
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
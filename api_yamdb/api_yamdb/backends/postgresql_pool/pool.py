@@ -0,0 +1,225 @@
+"""
+Пул подключений PostgreSQL внутри процесса.
+
+Подключения выдаются потокам процесса и возвращаются при закрытии
+подключения Django. Сломанное подключение и подключение
+в незавершённой транзакции в пул не возвращаются без отката.
+Подключение, простоявшее дольше check_after секунд, перед выдачей
+проверяется запросом SELECT 1. Если все size подключений заняты,
+поток ждёт до timeout секунд.
+
+Каждый пул раз в PUBLISH_INTERVAL секунд публикует свои счётчики
+в кэш ответов, откуда их читает команда db_pool_stats.
+
+ConnectionPool -- Пул подключений одной базы.
+get_pool       -- Возвращает пул базы в текущем процессе.
+pool_stats     -- Возвращает опубликованные счётчики пулов всех процессов.
+"""
+
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from psycopg2 import OperationalError
+from psycopg2.extensions import (TRANSACTION_STATUS_IDLE,
+                                 TRANSACTION_STATUS_UNKNOWN)
+
+KEY_PREFIX = 'db-pool'
+PUBLISH_INTERVAL = 5
+STATS_TIMEOUT = 60
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Пул подключений одной базы.
+
+    acquire  -- Выдаёт подключение из пула или открывает новое.
+    release  -- Возвращает подключение в пул.
+    snapshot -- Возвращает счётчики пула.
+    """
+
+    def __init__(self, alias, size, timeout, check_after):
+        self.alias = alias
+        self.size = size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.idle = []
+        self.opened = self.checked_out = 0
+        self.connects = self.waits = self.timeouts = 0
+        self.wait_time = 0.0
+        self.started = time.time()
+        self.published = 0.0
+        self.condition = threading.Condition()
+
+    def _take(self):
+        """Резервирует место в пуле, возвращает простаивающее подключение."""
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            if not self.idle and self.opened >= self.size:
+                self.waits += 1
+                started = time.monotonic()
+                while not self.idle and self.opened >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise OperationalError(
+                            f'Пул подключений {self.alias} занят: '
+                            f'{self.size} подключений, ожидание '
+                            f'{self.timeout} с'
+                        )
+                    self.condition.wait(remaining)
+                self.wait_time += time.monotonic() - started
+            self.checked_out += 1
+            if self.idle:
+                return self.idle.pop()
+            self.opened += 1
+            return None, 0.0
+
+    def _forget(self):
+        with self.condition:
+            self.opened -= 1
+            self.checked_out -= 1
+            self.condition.notify()
+
+    def acquire(self, connect):
+        """
+        Выдаёт подключение из пула или открывает новое.
+
+        connect -- функция, открывающая новое подключение.
+        """
+        connection, released = self._take()
+        if connection is not None and (
+            time.monotonic() - released < self.check_after
+            or _is_usable(connection)
+        ):
+            return connection
+        if connection is not None:
+            _close_quietly(connection)
+        try:
+            connection = connect()
+        except Exception:
+            self._forget()
+            raise
+        with self.condition:
+            self.connects += 1
+        return connection
+
+    def release(self, connection):
+        """Возвращает подключение в пул, сломанное закрывает."""
+        if not _reset(connection):
+            _close_quietly(connection)
+            self._forget()
+            return
+        with self.condition:
+            self.checked_out -= 1
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+        self._publish()
+
+    def snapshot(self):
+        """Возвращает счётчики пула."""
+        with self.condition:
+            return {
+                'alias': self.alias,
+                'process': _process_name(),
+                'size': self.size,
+                'opened': self.opened,
+                'checked_out': self.checked_out,
+                'idle': len(self.idle),
+                'connects': self.connects,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'timeouts': self.timeouts,
+                'started': self.started,
+                'updated': time.time(),
+            }
+
+    def _publish(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.published < PUBLISH_INTERVAL:
+            return
+        self.published = now
+        cache = caches[settings.API_CACHE_ALIAS]
+        key = _stats_key(self.alias, _process_name())
+        cache.set(key, self.snapshot(), timeout=STATS_TIMEOUT)
+        processes_key = _stats_key(self.alias, 'processes')
+        processes = cache.get(processes_key) or []
+        live = cache.get_many(processes)
+        if key not in processes or len(live) < len(processes):
+            # Счётчики остановленных процессов истекают по STATS_TIMEOUT.
+            cache.set(processes_key, [
+                name for name in processes if name in live and name != key
+            ] + [key], timeout=None)
+
+
+def _process_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _stats_key(alias, name):
+    return f'{KEY_PREFIX}:{alias}:{name}'
+
+
+def _is_usable(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Exception:
+        return False
+    return True
+
+
+def _reset(connection):
+    """Откатывает незавершённую транзакцию, False для сломанного."""
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status == TRANSACTION_STATUS_IDLE:
+        return True
+    try:
+        connection.rollback()
+    except Exception:
+        return False
+    return True
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def get_pool(alias, options):
+    """
+    Возвращает пул базы в текущем процессе.
+
+    options -- словарь POOL из настроек базы: SIZE, TIMEOUT,
+    CHECK_AFTER. Без SIZE пул не создаётся и возвращается None.
+    """
+    size = options.get('SIZE', 0)
+    if size <= 0:
+        return None
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                alias, size,
+                timeout=options.get('TIMEOUT', 10),
+                check_after=options.get('CHECK_AFTER', 10)
+            )
+    return _pools[alias]
+
+
+def pool_stats(alias='default'):
+    """Возвращает опубликованные счётчики пулов всех процессов."""
+    cache = caches[settings.API_CACHE_ALIAS]
+    keys = cache.get(_stats_key(alias, 'processes')) or []
+    return list(cache.get_many(keys).values())
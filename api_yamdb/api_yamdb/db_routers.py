@@ -0,0 +1,232 @@
+"""
+Чтение из реплик базы.
+
+Реплики перечислены в DATABASE_REPLICAS с весами: чтение в запросах
+GET, HEAD и OPTIONS распределяется по ним взвешенным циклом
+(при равных весах -- по очереди). Всё остальное идёт в default:
+запись, чтение в транзакции и после записи в том же запросе, чтение
+вне HTTP-запросов (команды, сигналы после ответа). Пользователь,
+который что-то записал, ещё DATABASE_REPLICA_PIN_SECONDS секунд
+читает из default, чтобы видеть свои изменения, пока реплики
+догоняют: по куке и по id пользователя из JWT в кэше ответов.
+
+RequestState             -- Состояние маршрутизации одного запроса.
+ReplicaRouter            -- Роутер чтения из реплик.
+read_from_primary        -- Читает из default внутри блока.
+ReplicaRoutingMiddleware -- Выбирает базу для чтения в запросе.
+"""
+
+import asyncio
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+PIN_COOKIE = 'db_primary'
+PIN_KEY_PREFIX = 'db-pin:user'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_request_state = ContextVar('db_request_state', default=None)
+_cycles = {}
+_cycles_lock = threading.Lock()
+
+
+class RequestState:
+    """Состояние маршрутизации одного запроса."""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def _weighted_order(replicas):
+    """
+    Порядок реплик на один цикл взвешенного обхода.
+
+    Плавный обход: реплика с весом 3 из суммы 4 встречается трижды,
+    но не три раза подряд.
+    """
+    current = dict.fromkeys(replicas, 0)
+    total = sum(replicas.values())
+    order = []
+    for _ in range(total):
+        for alias, weight in replicas.items():
+            current[alias] += weight
+        chosen = max(current, key=current.get)
+        current[chosen] -= total
+        order.append(chosen)
+    return order
+
+
+def _next_replica(replicas):
+    key = tuple(replicas.items())
+    with _cycles_lock:
+        if key not in _cycles:
+            _cycles[key] = itertools.cycle(_weighted_order(replicas))
+        return next(_cycles[key])
+
+
+class ReplicaRouter:
+    """
+    Роутер чтения из реплик.
+
+    db_for_read     -- Возвращает реплику для чтения в безопасном запросе.
+    db_for_write    -- Отмечает запись в запросе, пишет в default.
+    allow_relation  -- Разрешает связи между default и репликами.
+    allow_migrate   -- Запрещает миграции на репликах.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Возвращает реплику для чтения в безопасном запросе."""
+        state = _request_state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or state.wrote
+            or not settings.DATABASE_REPLICAS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+        return _next_replica(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        """Отмечает запись в запросе, пишет в default."""
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Разрешает связи между default и репликами."""
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Запрещает миграции на репликах."""
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Читает из default внутри блока.
+
+    Для данных, которые сохраняются в общий кэш: отстающая реплика
+    не должна попасть в кэш до следующей записи.
+    """
+    state = _request_state.get()
+    if state is None:
+        yield
+        return
+    use_replica, state.use_replica = state.use_replica, False
+    try:
+        yield
+    finally:
+        state.use_replica = use_replica
+
+
+def _pin_key(user_id):
+    return f'{PIN_KEY_PREFIX}:{user_id}'
+
+
+def _token_user_id(request):
+    """id пользователя из access-токена без запроса к базе."""
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(header) != 2 or header[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        return AccessToken(header[1]).get(api_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Выбирает базу для чтения в запросе.
+
+    Работает и синхронно, и под ASGI: асинхронный запрос ждёт ответа
+    без занятого потока, иначе запросы выполнялись бы по одному.
+
+    is_pinned -- Проверяет, писал ли клиент в базу недавно.
+    pin       -- Закрепляет клиента за default после записи.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как MiddlewareMixin: под ASGI экземпляр считается корутиной.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def _enter(self, request):
+        state = RequestState(bool(
+            settings.DATABASE_REPLICAS
+            and request.method in READ_METHODS
+            and not self.is_pinned(request)
+        ))
+        return state, _request_state.set(state)
+
+    def _must_pin(self, state):
+        return state.wrote and bool(settings.DATABASE_REPLICAS)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state, token = self._enter(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if self._must_pin(state):
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        state, token = self._enter(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if self._must_pin(state):
+            # Пользователь из сессии может читаться из базы.
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def is_pinned(self, request):
+        """Проверяет, писал ли клиент в базу недавно."""
+        if PIN_COOKIE in request.COOKIES:
+            return True
+        user_id = _token_user_id(request)
+        return user_id is not None and bool(
+            caches[settings.API_CACHE_ALIAS].get(_pin_key(user_id))
+        )
+
+    def pin(self, request, response):
+        """Закрепляет клиента за default после записи."""
+        seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=seconds, httponly=True, samesite='Lax'
+        )
+        user = getattr(request, 'user', None)
+        user_id = (
+            user.pk if user is not None and user.is_authenticated
+            else _token_user_id(request)
+        )
+        if user_id is not None:
+            caches[settings.API_CACHE_ALIAS].set(
+                _pin_key(user_id), 1, timeout=seconds
+            )
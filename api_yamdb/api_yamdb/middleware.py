@@ -0,0 +1,72 @@
+"""
+Middleware, которые не работают для запросов к API.
+
+API аутентифицирует запросы только по JWT, поэтому сессии, CSRF,
+пользователь из сессии и сообщения нужны лишь админке и страницам
+вроде /redoc/. Классы ниже -- подклассы middleware Django: для путей
+из API_PATH_PREFIX запрос сразу передаётся дальше, для остальных
+работает исходный middleware. Проверки админки видят в MIDDLEWARE
+подклассы нужных ей middleware.
+
+is_api_request           -- Проверяет, что запрос идёт к API.
+ApiSkipMixin             -- Пропускает middleware для запросов к API.
+SessionMiddleware        -- Сессии вне API.
+CsrfViewMiddleware       -- Проверка CSRF вне API.
+AuthenticationMiddleware -- Пользователь из сессии вне API.
+MessageMiddleware        -- Сообщения вне API.
+"""
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import csrf
+
+
+def is_api_request(request):
+    """Проверяет, что запрос идёт к API."""
+    return request.path_info.startswith(settings.API_PATH_PREFIX)
+
+
+class ApiSkipMixin:
+    """
+    Пропускает middleware для запросов к API.
+
+    Под ASGI get_response возвращает корутину, и она отдаётся
+    как есть, так что пропуск работает в обоих режимах.
+    """
+
+    def __call__(self, request):
+        if is_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(ApiSkipMixin, sessions_middleware.SessionMiddleware):
+    """Сессии вне API."""
+
+
+class CsrfViewMiddleware(ApiSkipMixin, csrf.CsrfViewMiddleware):
+    """
+    Проверка CSRF вне API.
+
+    process_view -- Проверяет CSRF-токен, кроме запросов к API.
+    """
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        """Проверяет CSRF-токен, кроме запросов к API."""
+        if is_api_request(request):
+            return None
+        return super().process_view(
+            request, callback, callback_args, callback_kwargs
+        )
+
+
+class AuthenticationMiddleware(
+    ApiSkipMixin, auth_middleware.AuthenticationMiddleware
+):
+    """Пользователь из сессии вне API."""
+
+
+class MessageMiddleware(ApiSkipMixin, messages_middleware.MessageMiddleware):
+    """Сообщения вне API."""
@@ -34,13 +34,20 @@ INSTALLED_APPS = [
     'api',
 ]
 
+# Сессии, CSRF, пользователь из сессии и сообщения не работают
+# для запросов к API (путь начинается с API_PATH_PREFIX), см.
+# api_yamdb/middleware.py; админка и /redoc/ получают их как раньше.
+
+API_PATH_PREFIX = '/api/'
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'api_yamdb.db_routers.ReplicaRoutingMiddleware',
+    'api_yamdb.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'api_yamdb.middleware.CsrfViewMiddleware',
+    'api_yamdb.middleware.AuthenticationMiddleware',
+    'api_yamdb.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -66,18 +73,118 @@ TEMPLATES = [
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
+# Подключение живёт DB_CONN_MAX_AGE секунд (0 -- закрывается после
+# каждого запроса). Переживающее запрос подключение проверяет
+# (DB_CONN_HEALTH_CHECKS) только бэкенд
+# DB_ENGINE=api_yamdb.backends.postgresql_pool, поэтому по умолчанию
+# подключения живут 60 секунд только с ним. С DB_POOL_SIZE > 0 он
+# берёт подключения из пула процесса (размер -- число потоков
+# воркера), и DB_CONN_MAX_AGE по умолчанию снова 0.
+
+_db_engine = os.getenv('DB_ENGINE', default='django.db.backends.postgresql')
+_db_pool_size = int(os.getenv('DB_POOL_SIZE', default=0))
+_db_conn_max_age = (
+    60 if _db_engine == 'api_yamdb.backends.postgresql_pool'
+    and not _db_pool_size else 0
+)
 
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': _db_engine,
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='Deadright1'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(
+            os.getenv('DB_CONN_MAX_AGE', default=_db_conn_max_age)
+        ),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', default='1'
+        ) == '1',
+        'POOL': {
+            'SIZE': _db_pool_size,
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'CHECK_AFTER': float(os.getenv('DB_POOL_CHECK_AFTER', default=10)),
+        },
+    }
+}
+
+# Реплики для чтения: DB_REPLICAS -- хосты реплик через запятую
+# (для SQLite -- пути к файлам копий базы), DB_REPLICA_WEIGHTS --
+# их веса через запятую, по умолчанию равные. Клиент, записавший
+# в базу, DB_REPLICA_PIN_SECONDS секунд читает из default.
+
+DATABASE_REPLICAS = {}
+_replica_weights = [
+    int(weight) for weight in
+    os.getenv('DB_REPLICA_WEIGHTS', default='').split(',') if weight
+]
+for _number, _address in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', default='').split(','))
+):
+    _alias = f'replica_{_number + 1}'
+    _field = 'NAME' if 'sqlite3' in DATABASES['default']['ENGINE'] else 'HOST'
+    DATABASES[_alias] = dict(
+        DATABASES['default'], **{_field: _address.strip()},
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS[_alias] = (
+        _replica_weights[_number] if _number < len(_replica_weights) else 1
+    )
+
+DATABASE_ROUTERS = ['api_yamdb.db_routers.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.getenv('DB_REPLICA_PIN_SECONDS', default=10)
+)
+
+# Cache
+# В продакшене с несколькими воркерами кэш должен быть общим,
+# например CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# и CACHE_LOCATION=/var/tmp/yamdb_cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
     }
 }
 
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+# Пользователь из JWT кэшируется в общем кэше на API_USER_CACHE_TIMEOUT
+# секунд и в памяти процесса на API_USER_LOCAL_CACHE_TIMEOUT секунд
+# (0 отключает кэш в памяти).
+
+API_USER_CACHE_TIMEOUT = int(os.getenv('API_USER_CACHE_TIMEOUT', default=60))
+API_USER_LOCAL_CACHE_TIMEOUT = float(
+    os.getenv('API_USER_LOCAL_CACHE_TIMEOUT', default=5)
+)
+
+# С API_TOKEN_CLAIMS=1 access-токены несут роль пользователя и версию
+# токенов, и права проверяются без чтения пользователя из базы.
+
+API_TOKEN_CLAIMS = os.getenv('API_TOKEN_CLAIMS', default='0') == '1'
+
+# С API_ASYNC_CATALOG=1 (только под ASGI-сервером) чтение каталога
+# выполняется в пуле из API_ASYNC_THREADS потоков, см. api/async_views.py.
+
+API_ASYNC_CATALOG = os.getenv('API_ASYNC_CATALOG', default='0') == '1'
+API_ASYNC_THREADS = int(os.getenv('API_ASYNC_THREADS', default=16))
+
+# С API_FAST_JSON=1 ответы рендерятся и тела запросов разбираются
+# через orjson (api/renderers.py, api/parsers.py), вывод тот же.
+
+API_FAST_JSON = os.getenv('API_FAST_JSON', default='0') == '1'
+
+# Наибольшее число произведений в одном запросе POST /titles/bulk/.
+
+TITLES_BULK_LIMIT = int(os.getenv('TITLES_BULK_LIMIT', default=10000))
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -131,7 +238,18 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.OrjsonRenderer' if API_FAST_JSON
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.OrjsonParser' if API_FAST_JSON
+        else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination'
                                 '.PageNumberPagination',
@@ -147,3 +265,22 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 EMAIL_ADMIN = 'teamSix@yambd.ru'
 EMAIL_SUBJECT = 'Код подтверждения YaMDB'
+
+# Очередь писем: их отправляет команда send_queued_mail пачками
+# по EMAIL_QUEUE_BATCH_SIZE. Неудачная попытка повторяется через
+# EMAIL_QUEUE_RETRY_DELAY секунд, каждая следующая -- вдвое позже.
+# Воркер забирает пачку на EMAIL_QUEUE_LEASE секунд: если он упал,
+# не отправив письма, их возьмут снова, когда срок истечёт.
+# Отправленные и неотправленные письма хранятся EMAIL_QUEUE_RETENTION
+# дней.
+
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv('EMAIL_QUEUE_BATCH_SIZE', default=50))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(
+    os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', default=6)
+)
+EMAIL_QUEUE_RETRY_DELAY = int(os.getenv('EMAIL_QUEUE_RETRY_DELAY', default=30))
+EMAIL_QUEUE_POLL_INTERVAL = float(
+    os.getenv('EMAIL_QUEUE_POLL_INTERVAL', default=2)
+)
+EMAIL_QUEUE_LEASE = int(os.getenv('EMAIL_QUEUE_LEASE', default=300))
+EMAIL_QUEUE_RETENTION = int(os.getenv('EMAIL_QUEUE_RETENTION', default=7))
@@ -2,8 +2,12 @@
 Приложение reviews.
 
 Содержит модули:
-admin      -- Админки для моделей приложения reviews.
-apps       -- Конфиги приложения reviews.
-models     -- Модели приложения rewiews.
-validators -- Валидаторы приложения reviews.
+admin       -- Админки для моделей приложения reviews.
+apps        -- Конфиги приложения reviews.
+leaderboard -- Рейтинговая таблица произведений.
+models      -- Модели приложения rewiews.
+ratings     -- Хранимый рейтинг произведений.
+search      -- Полнотекстовый поиск произведений.
+signals     -- Сигналы приложения reviews.
+validators  -- Валидаторы приложения reviews.
 """
@@ -12,3 +12,7 @@ class ReviewsConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        """Подключает сигналы приложения."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,157 @@
+"""
+Потоковая выгрузка таблиц, которые грузит import_csv.
+
+Строки читаются через QuerySet.iterator() (на PostgreSQL это
+серверный курсор) и сразу превращаются в текст, поэтому память
+не растёт с размером таблиц. Выгружаются все файлы import_csv
+с теми же столбцами, так что выгрузку CSV можно загрузить обратно.
+У пользователей, категорий, жанров и связей произведений с жанрами
+нет времени изменения, и с updated_since они выгружаются целиком.
+Пароли и коды подтверждения пользователей не выгружаются.
+
+Export              -- Описание выгрузки одной таблицы.
+EXPORTS             -- Выгрузки по названию.
+OUTPUTS             -- Форматы выгрузки и их типы содержимого.
+parse_updated_since -- Разбирает отметку времени для updated_since.
+export_rows         -- Возвращает строки выгрузки.
+stream_export       -- Возвращает выгрузку кусками текста.
+"""
+
+import csv
+import json
+from collections import namedtuple
+from datetime import date, datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from users.models import User
+
+from .models import Categories, Comment, Genre, Review, Title
+
+CHUNK_SIZE = 2000
+
+Export = namedtuple(
+    'Export', ('model', 'filename', 'columns', 'tracked'), defaults=(True,)
+)
+
+# В порядке внешних ключей, как их загружает import_csv.
+EXPORTS = {
+    'users': Export(User, 'users.csv', (
+        ('id', 'id'),
+        ('username', 'username'),
+        ('email', 'email'),
+        ('role', 'role'),
+        ('bio', 'bio'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+    ), tracked=False),
+    'categories': Export(Categories, 'category.csv', (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('slug', 'slug'),
+    ), tracked=False),
+    'genres': Export(Genre, 'genre.csv', (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('slug', 'slug'),
+    ), tracked=False),
+    'titles': Export(Title, 'titles.csv', (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('year', 'year'),
+        ('category', 'category_id'),
+        ('description', 'description'),
+    )),
+    'genre_title': Export(Title.genre.through, 'genre_title.csv', (
+        ('id', 'id'),
+        ('title_id', 'title_id'),
+        ('genre_id', 'genre_id'),
+    ), tracked=False),
+    'reviews': Export(Review, 'review.csv', (
+        ('id', 'id'),
+        ('title_id', 'title_id'),
+        ('text', 'text'),
+        ('author', 'author_id'),
+        ('score', 'score'),
+        ('pub_date', 'pub_date'),
+    )),
+    'comments': Export(Comment, 'comments.csv', (
+        ('id', 'id'),
+        ('review_id', 'review_id'),
+        ('text', 'text'),
+        ('author', 'author_id'),
+        ('pub_date', 'pub_date'),
+    )),
+}
+
+OUTPUTS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class _Echo:
+    """Буфер csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def parse_updated_since(value):
+    """
+    Разбирает отметку времени для updated_since.
+
+    Принимает дату или дату и время в ISO 8601, время без пояса
+    считается в поясе проекта. Для неверного значения
+    поднимает ValueError.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Неверная дата: {value}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    return moment
+
+
+def _format(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def export_rows(kind, updated_since=None):
+    """
+    Возвращает строки выгрузки по возрастанию id.
+
+    Таблицы без времени изменения выгружаются целиком
+    и с updated_since.
+    """
+    export = EXPORTS[kind]
+    queryset = export.model.objects.order_by('id')
+    if updated_since is not None and export.tracked:
+        queryset = queryset.filter(modified__gte=updated_since)
+    fields = [field for _, field in export.columns]
+    for row in queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        yield [_format(value) for value in row]
+
+
+def _csv_lines(kind, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for header, _ in EXPORTS[kind].columns])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(kind, rows):
+    headers = [header for header, _ in EXPORTS[kind].columns]
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), ensure_ascii=False) + '\n'
+
+
+def stream_export(kind, output, updated_since=None):
+    """Возвращает выгрузку кусками текста в формате ndjson или csv."""
+    render = {'ndjson': _ndjson_lines, 'csv': _csv_lines}[output]
+    return render(kind, export_rows(kind, updated_since))
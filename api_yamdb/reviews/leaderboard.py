@@ -0,0 +1,146 @@
+"""
+Рейтинговая таблица произведений.
+
+Строки есть у каждого произведения, в том числе без отзывов,
+поэтому новый отзыв обновляет таблицу одним UPDATE. Произведения
+без отзывов отсекаются в выдаче условием review_count.
+
+apply_leaderboard_delta -- Изменяет строки рейтинга произведения
+                           на одну оценку.
+sync_title_leaderboard  -- Пересобирает строки рейтинга одного произведения.
+add_titles              -- Создаёт строки рейтинга новых произведений.
+drop_scope              -- Удаляет строки рейтинга категории или жанра.
+rebuild_leaderboard     -- Пересобирает всю рейтинговую таблицу.
+"""
+
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import LeaderboardEntry, Title
+
+REBUILD_SQL = (
+    """
+    INSERT INTO reviews_leaderboardentry
+        (title_id, scope, scope_id, score_sum, review_count, average)
+    SELECT id, 'all', 0, score_sum, review_count,
+           COALESCE(score_sum * 1.0 / NULLIF(review_count, 0), 0)
+    FROM reviews_title
+    """,
+    """
+    INSERT INTO reviews_leaderboardentry
+        (title_id, scope, scope_id, score_sum, review_count, average)
+    SELECT id, 'category', category_id, score_sum, review_count,
+           COALESCE(score_sum * 1.0 / NULLIF(review_count, 0), 0)
+    FROM reviews_title
+    WHERE category_id IS NOT NULL
+    """,
+    """
+    INSERT INTO reviews_leaderboardentry
+        (title_id, scope, scope_id, score_sum, review_count, average)
+    SELECT t.id, 'genre', tg.genre_id, t.score_sum, t.review_count,
+           COALESCE(t.score_sum * 1.0 / NULLIF(t.review_count, 0), 0)
+    FROM reviews_title t
+    JOIN reviews_title_genre tg ON tg.title_id = t.id
+    """,
+)
+
+
+def apply_leaderboard_delta(title_id, score_delta, count_delta):
+    """
+    Изменяет строки рейтинга произведения на одну оценку.
+
+    Все строки произведения (общая, категории и жанров) меняются
+    одним UPDATE. Если строк ещё нет (произведение создано до
+    появления пустых строк), они создаются по счётчикам произведения.
+    """
+    review_count = F('review_count') + count_delta
+    updated = LeaderboardEntry.objects.filter(title_id=title_id).update(
+        score_sum=F('score_sum') + score_delta,
+        review_count=review_count,
+        average=Coalesce(
+            Cast(F('score_sum') + score_delta, FloatField())
+            / NullIf(review_count, 0),
+            Value(0.0)
+        )
+    )
+    if not updated and count_delta > 0:
+        sync_title_leaderboard(title_id)
+    return updated
+
+
+def _title_entries(title, genre_ids):
+    """Возвращает строки рейтинга произведения по его счётчикам."""
+    scopes = [(LeaderboardEntry.ALL, 0)]
+    if title.category_id:
+        scopes.append((LeaderboardEntry.CATEGORY, title.category_id))
+    scopes.extend((LeaderboardEntry.GENRE, genre_id) for genre_id in genre_ids)
+    return [
+        LeaderboardEntry(
+            title_id=title.pk,
+            scope=scope,
+            scope_id=scope_id,
+            score_sum=title.score_sum,
+            review_count=title.review_count,
+            average=(title.score_sum / title.review_count
+                     if title.review_count else 0)
+        )
+        for scope, scope_id in scopes
+    ]
+
+
+def sync_title_leaderboard(title_id):
+    """
+    Пересобирает строки рейтинга одного произведения.
+
+    Строка произведения блокируется (SELECT ... FOR UPDATE) до
+    удаления и вставки строк рейтинга. Отзыв меняет счётчики
+    произведения раньше строк рейтинга, поэтому параллельный
+    apply_leaderboard_delta ждёт эту транзакцию и не теряется,
+    а пересборка читает уже записанные счётчики.
+    """
+    with transaction.atomic():
+        title = Title.objects.select_for_update().filter(pk=title_id).only(
+            'category_id', 'score_sum', 'review_count'
+        ).first()
+        LeaderboardEntry.objects.filter(title_id=title_id).delete()
+        if title is None:
+            return
+        LeaderboardEntry.objects.bulk_create(_title_entries(
+            title, title.genre.values_list('id', flat=True)
+        ))
+
+
+def add_titles(title_genres):
+    """
+    Создаёт строки рейтинга новых произведений.
+
+    title_genres -- Пары (произведение, id жанров).
+
+    Уже существующие строки (например, созданные сигналом
+    post_save) пропускаются.
+    """
+    return LeaderboardEntry.objects.bulk_create(
+        (
+            entry
+            for title, genre_ids in title_genres
+            for entry in _title_entries(title, genre_ids)
+        ),
+        ignore_conflicts=True
+    )
+
+
+def drop_scope(scope, scope_id):
+    """Удаляет строки рейтинга категории или жанра."""
+    return LeaderboardEntry.objects.filter(
+        scope=scope, scope_id=scope_id
+    ).delete()
+
+
+def rebuild_leaderboard():
+    """Пересобирает всю рейтинговую таблицу по счётчикам произведений."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        LeaderboardEntry.objects.all().delete()
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
+    return LeaderboardEntry.objects.count()
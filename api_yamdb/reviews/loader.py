@@ -0,0 +1,458 @@
+"""
+Пакетная загрузка CSV-файлов static/data.
+
+Файлы читаются потоком и вставляются пачками по batch_size строк:
+на PostgreSQL через COPY FROM STDIN, на остальных базах через
+executemany одного INSERT. Сигналы моделей не вызываются, поэтому
+после загрузки счётчики произведений и рейтинговая таблица
+пересчитываются целиком, а последовательности id сдвигаются
+за загруженные значения.
+
+Для каждой строки сохраняется md5 её значений (ImportDigest).
+В инкрементальном режиме строки с прежним хэшем, которые есть
+в таблице, пропускаются, а остальные (в том числе удалённые из
+базы) вставляются или обновляются по id через
+INSERT ... ON CONFLICT, так что повторная загрузка стоит
+пропорционально числу изменённых строк.
+
+Большие файлы (Table.split) можно загружать параллельно: файл
+делится на диапазоны байтов по границам записей, и каждый диапазон
+грузится отдельным процессом со своим подключением к базе.
+
+Table               -- Описание CSV-файла и модели, в которую он грузится.
+TABLES              -- Файлы в порядке внешних ключей.
+LoadStats           -- Итог загрузки одного файла.
+filled_tables       -- Возвращает таблицы, в которых уже есть строки.
+split_csv           -- Делит CSV-файл на диапазоны байтов.
+load_table          -- Загружает один CSV-файл или его диапазон.
+load_table_parallel -- Загружает CSV-файл диапазонами в пуле процессов.
+reset_sequences     -- Сдвигает последовательности id за загруженные строки.
+"""
+
+import csv
+import hashlib
+import io
+import os
+from collections import namedtuple
+from functools import partial
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.utils import timezone
+from users.models import User
+
+from .models import Categories, Comment, Genre, ImportDigest, Review, Title
+
+COPY_NULL = r'\N'
+SPLIT_BLOCK = 1024 * 1024
+
+Table = namedtuple(
+    'Table', ('model', 'filename', 'renames', 'title_column', 'split'),
+    defaults=(None, False)
+)
+
+TABLES = (
+    Table(User, 'users.csv', {}),
+    Table(Categories, 'category.csv', {}),
+    Table(Genre, 'genre.csv', {}),
+    Table(Title, 'titles.csv', {'category': 'category_id'}, 'id'),
+    Table(Title.genre.through, 'genre_title.csv', {}, 'title_id'),
+    Table(Review, 'review.csv', {'author': 'author_id'}, 'title_id', True),
+    Table(Comment, 'comments.csv', {'author': 'author_id'}, split=True),
+)
+
+LoadStats = namedtuple(
+    'LoadStats', ('inserted', 'updated', 'unchanged', 'title_ids')
+)
+
+
+def filled_tables(tables, using='default'):
+    """
+    Возвращает таблицы, в которых уже есть строки.
+
+    Полная загрузка вставляет строки без проверки id, поэтому
+    её нужно проверять до начала загрузки.
+    """
+    return [
+        table for table in tables
+        if table.model.objects.using(using).exists()
+    ]
+
+
+def _record_starts(csv_file, targets):
+    """
+    Возвращает начала записей не раньше смещений targets.
+
+    Перевод строки считается концом записи, только если до него
+    в файле чётное число кавычек.
+    """
+    starts = []
+    position = quotes = 0
+    for block in iter(partial(csv_file.read, SPLIT_BLOCK), b''):
+        offset = 0
+        while targets:
+            offset = max(offset, targets[0] - position)
+            newline = block.find(b'\n', offset)
+            if newline == -1:
+                break
+            offset = newline + 1
+            if (quotes + block.count(b'"', 0, newline)) % 2:
+                continue
+            starts.append(position + offset)
+            targets = [
+                target for target in targets if target > position + offset
+            ]
+        quotes += block.count(b'"')
+        position += len(block)
+    return starts
+
+
+def split_csv(path, parts):
+    """
+    Делит CSV-файл на parts диапазонов байтов.
+
+    Диапазоны -- пары (начало, конец) по границам записей, первый
+    начинается после заголовка. Переводы строк внутри кавычек
+    границей не считаются. Диапазонов может быть меньше parts,
+    если файл мал.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as csv_file:
+        starts = _record_starts(
+            csv_file, [size * part // parts for part in range(parts)]
+        )
+    return [
+        (start, end) for start, end in zip(starts, starts[1:] + [size])
+        if start < end
+    ]
+
+
+class _Columns:
+    """
+    Соответствие столбцов CSV полям модели.
+
+    Поля, которых нет в файле (кроме первичного ключа), получают
+    значение по умолчанию, поля auto_now и auto_now_add -- время
+    начала загрузки.
+    Дата из файла (например, pub_date) не перезаписывается.
+
+    row_id     -- Возвращает id строки.
+    title_id   -- Возвращает id произведения, которого касается строка.
+    python_row -- Возвращает значения строки для INSERT.
+    copy_row   -- Возвращает текстовые значения строки для COPY.
+    """
+
+    def __init__(self, table, header, now):
+        attnames = [table.renames.get(name, name) for name in header]
+        by_attname = {
+            field.attname: field
+            for field in table.model._meta.concrete_fields
+        }
+        unknown = set(attnames) - set(by_attname)
+        if unknown:
+            raise ValueError(
+                f'{table.filename}: неизвестные столбцы '
+                f'{", ".join(sorted(unknown))}'
+            )
+        self.fields = [by_attname[attname] for attname in attnames]
+        pk = table.model._meta.pk
+        if pk.attname not in attnames:
+            raise ValueError(f'{table.filename}: нет столбца {pk.attname}')
+        self.pk = pk
+        self.pk_index = attnames.index(pk.attname)
+        self.title_index = (
+            attnames.index(table.title_column)
+            if table.title_column in attnames else None
+        )
+        self.defaults = {}
+        for attname, field in by_attname.items():
+            if attname in attnames or field.primary_key:
+                continue
+            if getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False
+            ):
+                self.defaults[field] = now
+            else:
+                self.defaults[field] = field.get_default()
+        self.all_fields = self.fields + list(self.defaults)
+        self.update_fields = [
+            field for field in self.all_fields
+            if not field.primary_key and (
+                field in self.fields or getattr(field, 'auto_now', False)
+            )
+        ]
+
+    def row_id(self, values):
+        """Возвращает id строки."""
+        return int(values[self.pk_index])
+
+    def title_id(self, values):
+        """Возвращает id произведения, которого касается строка."""
+        if self.title_index is None or not values[self.title_index]:
+            return None
+        return int(values[self.title_index])
+
+    def python_row(self, values, connection):
+        """Возвращает значения строки для INSERT."""
+        row = [
+            field.get_db_prep_save(
+                None if value == '' and field.null
+                else field.to_python(value),
+                connection
+            )
+            for field, value in zip(self.fields, values)
+        ]
+        row.extend(
+            field.get_db_prep_save(value, connection)
+            for field, value in self.defaults.items()
+        )
+        return row
+
+    def copy_row(self, values):
+        """Возвращает текстовые значения строки для COPY."""
+        row = [
+            COPY_NULL if value == '' and field.null else value
+            for field, value in zip(self.fields, values)
+        ]
+        row.extend(
+            COPY_NULL if value is None else
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in self.defaults.values()
+        )
+        return row
+
+
+def _batches(rows, batch_size):
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _digest(values):
+    return hashlib.md5('\x1f'.join(values).encode()).hexdigest()
+
+
+def _column_list(connection, fields):
+    quote = connection.ops.quote_name
+    return ', '.join(quote(field.column) for field in fields)
+
+
+def _insert(connection, table_name, columns, batch, conflict=None,
+            update_columns=()):
+    """
+    Вставляет пачку строк одним executemany.
+
+    С conflict (столбцы уникального ключа) строки с тем же ключом
+    обновляются: update_columns берутся из новой строки.
+    """
+    quote = connection.ops.quote_name
+    sql = (
+        f'INSERT INTO {quote(table_name)} '
+        f'({_column_list(connection, columns)}) '
+        f'VALUES ({", ".join(["%s"] * len(columns))})'
+    )
+    if conflict:
+        assignments = ', '.join(
+            f'{quote(field.column)} = EXCLUDED.{quote(field.column)}'
+            for field in update_columns
+        )
+        sql += (
+            f' ON CONFLICT ({_column_list(connection, conflict)}) '
+            f'DO UPDATE SET {assignments}'
+        )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, batch)
+
+
+def _copy(connection, table_name, columns, batch):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    sql = (
+        f'COPY {quote(table_name)} ({_column_list(connection, columns)}) '
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def _save_digests(connection, table_name, digests, use_copy):
+    """
+    Сохраняет хэши строк, заменяя прежние.
+
+    COPY не умеет ON CONFLICT, поэтому прежние хэши этих строк
+    (остались, например, после очистки таблицы перед полной
+    загрузкой) сначала удаляются.
+    """
+    fields = [
+        ImportDigest._meta.get_field(name)
+        for name in ('table_name', 'row_id', 'digest')
+    ]
+    rows = [(table_name, row_id, digest) for row_id, digest in digests]
+    if use_copy:
+        ImportDigest.objects.using(connection.alias).filter(
+            table_name=table_name, row_id__in=[row[1] for row in rows]
+        ).delete()
+        _copy(connection, ImportDigest._meta.db_table, fields, rows)
+    else:
+        _insert(connection, ImportDigest._meta.db_table, fields, rows,
+                conflict=fields[:2], update_columns=fields[2:])
+
+
+class _Loader:
+    """
+    Загрузка пачек строк одного файла.
+
+    load_full        -- Вставляет пачку в пустую таблицу.
+    load_incremental -- Вставляет новые и обновляет изменённые строки.
+    """
+
+    def __init__(self, table, columns, connection):
+        self.table_name = table.model._meta.db_table
+        self.model = table.model
+        self.columns = columns
+        self.connection = connection
+        self.use_copy = connection.vendor == 'postgresql'
+        self.inserted = self.updated = self.unchanged = 0
+        self.title_ids = set()
+
+    def load_full(self, batch):
+        """Вставляет пачку в пустую таблицу."""
+        columns = self.columns
+        if self.use_copy:
+            _copy(self.connection, self.table_name, columns.all_fields,
+                  [columns.copy_row(values) for values in batch])
+        else:
+            _insert(self.connection, self.table_name, columns.all_fields,
+                    [columns.python_row(values, self.connection)
+                     for values in batch])
+        _save_digests(
+            self.connection, self.table_name,
+            [(columns.row_id(values), _digest(values)) for values in batch],
+            self.use_copy
+        )
+        self.inserted += len(batch)
+
+    def load_incremental(self, batch):
+        """
+        Вставляет новые и обновляет изменённые строки.
+
+        Строка с прежним хэшем пропускается, только если она ещё
+        есть в таблице: удалённые из базы строки вставляются снова.
+        """
+        columns = self.columns
+        by_id = {columns.row_id(values): values for values in batch}
+        using = self.connection.alias
+        known = dict(ImportDigest.objects.using(using).filter(
+            table_name=self.table_name, row_id__in=list(by_id)
+        ).values_list('row_id', 'digest'))
+        existing = set(self.model.objects.using(using).filter(
+            pk__in=list(by_id)
+        ).values_list('pk', flat=True))
+        changed = {
+            row_id: values for row_id, values in by_id.items()
+            if row_id not in existing or known.get(row_id) != _digest(values)
+        }
+        self.unchanged += len(by_id) - len(changed)
+        if not changed:
+            return
+        inserted = len(set(changed) - existing)
+        self.inserted += inserted
+        self.updated += len(changed) - inserted
+        _insert(
+            self.connection, self.table_name, columns.all_fields,
+            [columns.python_row(values, self.connection)
+             for values in changed.values()],
+            conflict=[columns.pk], update_columns=columns.update_fields
+        )
+        _save_digests(
+            self.connection, self.table_name,
+            [(row_id, _digest(values)) for row_id, values in changed.items()],
+            use_copy=False
+        )
+        self.title_ids.update(
+            title_id for title_id in map(columns.title_id, changed.values())
+            if title_id is not None
+        )
+
+
+def _lines(csv_file, start=None, end=None):
+    """Возвращает строки файла, открытого в двоичном режиме."""
+    if start is not None:
+        csv_file.seek(start)
+    while end is None or csv_file.tell() < end:
+        line = csv_file.readline()
+        if not line:
+            return
+        yield line.decode('utf-8')
+
+
+def load_table(table, path, batch_size, using='default', incremental=False,
+               byte_range=None):
+    """
+    Загружает один CSV-файл.
+
+    Без incremental таблица должна быть пустой. В инкрементальном
+    режиме строки сверяются по id с хэшами прошлой загрузки.
+    С byte_range (пара из split_csv) грузится только этот диапазон.
+    Возвращает LoadStats; title_ids -- произведения, которых
+    коснулись изменённые строки (только в инкрементальном режиме).
+    """
+    connection = connections[using]
+    with open(path, 'rb') as csv_file:
+        reader = csv.reader(_lines(csv_file))
+        columns = _Columns(table, next(reader), timezone.now())
+        if byte_range is not None:
+            reader = csv.reader(_lines(csv_file, *byte_range))
+        loader = _Loader(table, columns, connection)
+        load = loader.load_incremental if incremental else loader.load_full
+        with transaction.atomic(using=using):
+            for batch in _batches(reader, batch_size):
+                load(batch)
+    return LoadStats(
+        loader.inserted, loader.updated, loader.unchanged, loader.title_ids
+    )
+
+
+def load_table_parallel(executor, table, path, batch_size, parts,
+                        incremental=False):
+    """
+    Загружает CSV-файл диапазонами в пуле процессов.
+
+    executor -- ProcessPoolExecutor, каждый процесс которого держит
+    своё подключение к базе. Каждый диапазон грузится в своей
+    транзакции. Возвращает общий LoadStats всех диапазонов.
+    """
+    # Подключение родителя не должно достаться процессам при fork.
+    connections.close_all()
+    futures = [
+        executor.submit(
+            load_table, table, path, batch_size,
+            incremental=incremental, byte_range=byte_range
+        )
+        for byte_range in split_csv(path, parts)
+    ]
+    inserted = updated = unchanged = 0
+    title_ids = set()
+    for future in futures:
+        stats = future.result()
+        inserted += stats.inserted
+        updated += stats.updated
+        unchanged += stats.unchanged
+        title_ids |= stats.title_ids
+    return LoadStats(inserted, updated, unchanged, title_ids)
+
+
+def reset_sequences(models, using='default'):
+    """Сдвигает последовательности id за загруженные строки."""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from reviews.models import Title
+from reviews.search import search_titles
+
+WORDS = (
+    'побег', 'отец', 'война', 'мир', 'ночь', 'звезда', 'город', 'море',
+    'любовь', 'тайна', 'дорога', 'солнце', 'история', 'последний', 'дом',
+    'star', 'night', 'road', 'king', 'ring', 'river', 'light', 'dream',
+)
+RARE_WORDS = 2000
+
+
+class Command(BaseCommand):
+    """
+    Замер полнотекстового поиска на синтетическом каталоге произведений
+    """
+
+    help = (
+        'Заполняет каталог синтетическими произведениями, замеряет '
+        '?search= против фильтра name (LIKE) и откатывает изменения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Не откатывать созданные произведения'
+        )
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        with transaction.atomic():
+            self.fill(rnd, options['titles'], options['batch_size'])
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE reviews_title')
+            queries = ('звезда', 'ночь дорога', 'king', 'w17', 'w1999 мир')
+            for query in queries:
+                self.report(
+                    f'search={query!r}',
+                    lambda: search_titles(Title.objects.all(), query),
+                    options['repeat']
+                )
+                word = query.split()[0]
+                self.report(
+                    f'name contains {word!r}',
+                    lambda: Title.objects.filter(name__contains=word),
+                    options['repeat']
+                )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def fill(self, rnd, total, batch_size):
+        """Создаёт синтетические произведения пачками."""
+        vocabulary = WORDS + tuple(f'w{i}' for i in range(RARE_WORDS))
+        weights = [50] * len(WORDS) + [1] * RARE_WORDS
+        started = time.perf_counter()
+        for offset in range(0, total, batch_size):
+            size = min(batch_size, total - offset)
+            Title.objects.bulk_create(
+                Title(
+                    name=' '.join(rnd.choices(vocabulary, weights, k=3)),
+                    description=' '.join(
+                        rnd.choices(vocabulary, weights, k=12)
+                    ),
+                    year=rnd.randint(1900, 2020),
+                )
+                for _ in range(size)
+            )
+        self.stdout.write(
+            f'Создано {total} произведений за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+
+    def report(self, label, make_queryset, repeat):
+        """Замеряет подсчёт и первую страницу результатов."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = make_queryset()
+            count = queryset.count()
+            list(queryset[:5])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f'{label:<28} найдено {count:>8}  '
+            f'медиана {statistics.median(timings):8.1f} мс  '
+            f'p95 {p95:8.1f} мс'
+        )
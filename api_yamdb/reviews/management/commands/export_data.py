@@ -0,0 +1,57 @@
+import os
+
+from django.core.management import BaseCommand, CommandError
+from reviews.export import EXPORTS, OUTPUTS, parse_updated_since, stream_export
+
+
+class Command(BaseCommand):
+    """
+    Потоковая выгрузка таблиц в формате import_csv
+    """
+
+    help = (
+        'Выгружает таблицы в NDJSON или CSV. CSV с --dir пишется '
+        'в файлы с теми же именами и столбцами, что читает import_csv'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds', nargs='*',
+            help=f'Таблицы для выгрузки ({", ".join(EXPORTS)}), '
+                 'по умолчанию все'
+        )
+        parser.add_argument('--output', choices=tuple(OUTPUTS),
+                            default='csv')
+        parser.add_argument(
+            '--updated-since',
+            help='Только строки, изменённые с этой даты (ISO 8601)'
+        )
+        parser.add_argument(
+            '--dir',
+            help='Каталог для файлов, без него выгрузка идёт в stdout'
+        )
+
+    def handle(self, *args, **options):
+        kinds = options['kinds'] or tuple(EXPORTS)
+        unknown = set(kinds) - set(EXPORTS)
+        if unknown:
+            raise CommandError(f'Неизвестные таблицы: {", ".join(unknown)}')
+        updated_since = None
+        if options['updated_since']:
+            try:
+                updated_since = parse_updated_since(options['updated_since'])
+            except ValueError as error:
+                raise CommandError(error)
+        for kind in kinds:
+            chunks = stream_export(kind, options['output'], updated_since)
+            if not options['dir']:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending='')
+                continue
+            filename = EXPORTS[kind].filename.replace(
+                '.csv', f'.{options["output"]}'
+            )
+            path = os.path.join(options['dir'], filename)
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f'{kind}: {path}'))
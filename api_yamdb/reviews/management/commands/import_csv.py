@@ -1,62 +1,138 @@
-import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+import django
+from api.cache import bump_version
 from django.conf import settings
-from django.core.management import BaseCommand
-from reviews.models import Categories, Comment, Genre, Review, Title, User
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from reviews.leaderboard import rebuild_leaderboard, sync_title_leaderboard
+from reviews.loader import (TABLES, filled_tables, load_table,
+                            load_table_parallel, reset_sequences)
+from reviews.models import Categories, Genre, Title
+from reviews.ratings import rebuild_ratings
 
-TABLES = {
-    User: 'users.csv',
-    Categories: 'category.csv',
-    Genre: 'genre.csv',
-    Title: 'titles.csv',
-    Review: 'review.csv',
-    Comment: 'comments.csv',
-}
+REFRESH_CHUNK = 500
 
 
 class Command(BaseCommand):
     """
-    Импорт файлов csv в базу данных sqlite
+    Импорт файлов csv в базу данных
     """
 
-    def handle(self, *args, **kwargs):
-        for model, csv_f in TABLES.items():
-            with open(
-                    f'{settings.BASE_DIR}/static/data/{csv_f}',
-                    'r',
-                    encoding='utf-8'
-            ) as csv_file:
-                if model == Title:
-                    reader = csv.DictReader(csv_file)
-                    for row in reader:
-                        category_obj, created = Title.objects.get_or_create(
-                            category_id=row['category'],
-                            name=row['name'],
-                            year=row['year'],
-                            description=None,
-                        )
-                if model == Review:
-                    reader = csv.DictReader(csv_file)
-                    for row in reader:
-                        category_obj, created = Review.objects.get_or_create(
-                            title_id=row['title_id'],
-                            text=row['text'],
-                            author_id=row['author'],
-                            score=row['score'],
-                            pub_date=row['pub_date'],
-                        )
-                if model == Comment:
-                    reader = csv.DictReader(csv_file)
-                    for row in reader:
-                        category_obj, created = Comment.objects.get_or_create(
-                            review_id=row['review_id'],
-                            text=row['text'],
-                            author_id=row['author'],
-                            pub_date=row['pub_date'],
-                        )
+    help = (
+        'Загружает CSV-файлы static/data пачками (COPY на PostgreSQL), '
+        'пересчитывает рейтинги и сдвигает последовательности id. '
+        'С --incremental обновляет уже загруженную базу, '
+        'с --workers грузит отзывы и комментарии в несколько процессов'
+    )
 
-                else:
-                    reader = csv.DictReader(csv_file)
-                    model.objects.bulk_create(
-                        model(**data) for data in reader)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с CSV-файлами'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Вставить новые и обновить изменённые строки по id, '
+                 'неизменённые строки пропустить'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов для review.csv и comments.csv '
+                 '(только PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        if options['workers'] < 1:
+            raise CommandError('--workers должен быть больше нуля')
+        if not options['incremental']:
+            self.check_empty(options['data_dir'])
+        workers = options['workers']
+        if workers > 1 and connection.vendor != 'postgresql':
+            self.stderr.write(
+                '--workers поддерживается только на PostgreSQL, '
+                'загрузка идёт в одном процессе'
+            )
+            workers = 1
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(workers, initializer=django.setup)
+        try:
+            title_ids = self.load_tables(options, executor, workers)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        reset_sequences([table.model for table in TABLES])
+        if options['incremental']:
+            self.refresh_titles(sorted(title_ids))
+        else:
+            rebuild_ratings()
+            rebuild_leaderboard()
+        for model in (Genre, Categories):
+            bump_version(model._meta.label_lower)
         self.stdout.write(self.style.SUCCESS('Данные загружены'))
+
+    def check_empty(self, data_dir):
+        """Проверяет, что таблицы для полной загрузки пусты."""
+        filled = filled_tables(
+            table for table in TABLES
+            if os.path.exists(os.path.join(data_dir, table.filename))
+        )
+        if filled:
+            raise CommandError(
+                'В базе уже есть данные для '
+                f'{", ".join(table.filename for table in filled)}: '
+                'обновите их с --incremental или очистите таблицы'
+            )
+
+    def load_tables(self, options, executor, workers):
+        """
+        Загружает файлы по порядку внешних ключей.
+
+        Дочерние таблицы начинают грузиться только после того, как
+        загружены все диапазоны родительских. Возвращает id
+        произведений, которых коснулись изменённые строки.
+        """
+        title_ids = set()
+        for table in TABLES:
+            path = os.path.join(options['data_dir'], table.filename)
+            if not os.path.exists(path):
+                self.stdout.write(f'{table.filename}: файла нет, пропущен')
+                continue
+            started = time.perf_counter()
+            try:
+                if executor is not None and table.split:
+                    stats = load_table_parallel(
+                        executor, table, path, options['batch_size'],
+                        workers, incremental=options['incremental']
+                    )
+                else:
+                    stats = load_table(
+                        table, path, options['batch_size'],
+                        incremental=options['incremental']
+                    )
+            except ValueError as error:
+                raise CommandError(error)
+            elapsed = time.perf_counter() - started
+            rows = stats.inserted + stats.updated + stats.unchanged
+            title_ids |= stats.title_ids
+            self.stdout.write(
+                f'{table.filename}: добавлено {stats.inserted}, '
+                f'обновлено {stats.updated}, без изменений {stats.unchanged} '
+                f'за {elapsed:.1f} с ({rows / max(elapsed, 1e-6):.0f} строк/с)'
+            )
+        return title_ids
+
+    def refresh_titles(self, title_ids):
+        """Пересчитывает рейтинг изменённых произведений."""
+        for offset in range(0, len(title_ids), REFRESH_CHUNK):
+            chunk = title_ids[offset:offset + REFRESH_CHUNK]
+            rebuild_ratings(Title.objects.filter(pk__in=chunk))
+            for title_id in chunk:
+                sync_title_leaderboard(title_id)
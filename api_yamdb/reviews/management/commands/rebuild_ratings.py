@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+from reviews.leaderboard import rebuild_leaderboard
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    """
+    Пересчёт хранимого рейтинга произведений по отзывам
+    """
+
+    help = (
+        'Пересчитывает сумму оценок, число отзывов и распределение '
+        'оценок всех произведений и пересобирает рейтинговую таблицу'
+    )
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рейтинг пересчитан: {updated} произведений')
+        )
+        entries = rebuild_leaderboard()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рейтинговая таблица: {entries} строк')
+        )
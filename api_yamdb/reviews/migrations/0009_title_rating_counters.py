@@ -0,0 +1,48 @@
+# Generated by Django 3.2.18 on 2026-10-18 03:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_rating_counters(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+
+    def stats(aggregate):
+        return Coalesce(
+            Subquery(
+                Review.objects.filter(title=OuterRef('pk'))
+                .order_by()
+                .values('title')
+                .annotate(value=aggregate)
+                .values('value')
+            ),
+            0
+        )
+
+    Title.objects.update(
+        score_sum=stats(Sum('score')),
+        review_count=stats(Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_auto_20230402_0248'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.18 on 2026-10-18 03:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FILL_LEADERBOARD_SQL = [
+    """
+    INSERT INTO reviews_leaderboardentry
+        (title_id, scope, scope_id, score_sum, review_count, average)
+    SELECT id, 'all', 0, score_sum, review_count,
+           score_sum * 1.0 / review_count
+    FROM reviews_title
+    WHERE review_count > 0
+    """,
+    """
+    INSERT INTO reviews_leaderboardentry
+        (title_id, scope, scope_id, score_sum, review_count, average)
+    SELECT id, 'category', category_id, score_sum, review_count,
+           score_sum * 1.0 / review_count
+    FROM reviews_title
+    WHERE review_count > 0 AND category_id IS NOT NULL
+    """,
+    """
+    INSERT INTO reviews_leaderboardentry
+        (title_id, scope, scope_id, score_sum, review_count, average)
+    SELECT t.id, 'genre', tg.genre_id, t.score_sum, t.review_count,
+           t.score_sum * 1.0 / t.review_count
+    FROM reviews_title t
+    JOIN reviews_title_genre tg ON tg.title_id = t.id
+    WHERE t.review_count > 0
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_title_review_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'All'), ('category', 'Category'), ('genre', 'Genre')], max_length=8)),
+                ('scope_id', models.PositiveBigIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('average', models.FloatField(default=0)),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title')),
+            ],
+            options={
+                'verbose_name': 'Строка рейтинга',
+                'verbose_name_plural': 'Рейтинг произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['scope', 'scope_id', '-average', '-review_count'], name='leaderboard_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('title', 'scope', 'scope_id'), name='unique_leaderboard_entry'),
+        ),
+        migrations.RunSQL(FILL_LEADERBOARD_SQL, migrations.RunSQL.noop),
+    ]
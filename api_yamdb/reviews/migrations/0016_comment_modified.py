@@ -0,0 +1,25 @@
+# Generated by Django 3.2.18 on 2026-10-18 03:25
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_comment_modified(apps, schema_editor):
+    Comment = apps.get_model('reviews', 'Comment')
+    Comment.objects.update(modified=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_comment_modified, migrations.RunPython.noop),
+    ]
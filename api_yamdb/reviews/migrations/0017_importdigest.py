@@ -0,0 +1,30 @@
+# Generated by Django 3.2.18 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_comment_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=64)),
+                ('row_id', models.BigIntegerField()),
+                ('digest', models.CharField(max_length=32)),
+            ],
+            options={
+                'verbose_name': 'Хэш импортированной строки',
+                'verbose_name_plural': 'Хэши импортированных строк',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importdigest',
+            constraint=models.UniqueConstraint(fields=('table_name', 'row_id'), name='unique_import_digest'),
+        ),
+    ]
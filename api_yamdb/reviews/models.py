@@ -7,6 +7,9 @@ Genre      -- Модель жанров произведений.
 Title      -- Модель произведений.
 Review     -- Модель отзывов.
 Comment    -- Модель комментариев.
+
+LeaderboardEntry -- Строка рейтинговой таблицы произведений.
+ImportDigest     -- Хэш строки CSV, загруженной командой import_csv.
 """
 
 import datetime
@@ -96,14 +99,27 @@ class Title(models.Model):
     """
     Модель произведений.
 
-    name        -- Название произведения.
-    description -- Описание произведения.
-    year        -- Год выпуска произведения.
-    genre       -- Жанр произведения.
-    category    -- Категория произведения.
+    name         -- Название произведения.
+    description  -- Описание произведения.
+    year         -- Год выпуска произведения.
+    genre        -- Жанр произведения.
+    category     -- Категория произведения.
+    score_sum    -- Сумма оценок всех отзывов на произведение.
+    review_count -- Количество отзывов на произведение.
+    modified     -- Время изменения произведения или его отзывов.
+    score_count_1 ... score_count_10 -- Число отзывов с каждой оценкой.
 
     Методы:
-    __str__ -- Возвращает название произведения.
+    __str__         -- Возвращает название произведения.
+    save            -- Сохраняет произведение, не перезаписывая
+                       счётчики отзывов.
+    histogram_field -- Возвращает имя счётчика отзывов с оценкой.
+    rating          -- Возвращает округлённую вниз среднюю оценку
+                       произведения.
+    histogram       -- Возвращает число отзывов с каждой оценкой.
+
+    Субклассы:
+    Meta -- Метакласс модели Title.
     """
 
     name = models.CharField(verbose_name='Название', max_length=256)
@@ -126,11 +142,131 @@ class Title(models.Model):
         blank=True,
         null=True
     )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+    score_count_1 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 1',
+        default=0,
+        editable=False
+    )
+    score_count_2 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 2',
+        default=0,
+        editable=False
+    )
+    score_count_3 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 3',
+        default=0,
+        editable=False
+    )
+    score_count_4 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 4',
+        default=0,
+        editable=False
+    )
+    score_count_5 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 5',
+        default=0,
+        editable=False
+    )
+    score_count_6 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 6',
+        default=0,
+        editable=False
+    )
+    score_count_7 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 7',
+        default=0,
+        editable=False
+    )
+    score_count_8 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 8',
+        default=0,
+        editable=False
+    )
+    score_count_9 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 9',
+        default=0,
+        editable=False
+    )
+    score_count_10 = models.PositiveIntegerField(
+        verbose_name='Отзывов с оценкой 10',
+        default=0,
+        editable=False
+    )
+
+    SCORES = range(1, 11)
+    HISTOGRAM_FIELDS = tuple(f'score_count_{score}' for score in SCORES)
+    COUNTER_FIELDS = ('score_sum', 'review_count', *HISTOGRAM_FIELDS)
 
     def __str__(self):
         """Возвращает название произведения."""
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет произведение, не перезаписывая счётчики отзывов.
+
+        Счётчики меняют только сигналы отзывов и пересчёт рейтинга.
+        Копия произведения в памяти могла устареть, пока отзыв
+        менял их в базе, поэтому при обновлении без update_fields
+        сохраняются все поля, кроме счётчиков.
+        """
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def histogram_field(score):
+        """Возвращает имя счётчика отзывов с оценкой."""
+        return f'score_count_{score}'
+
+    @property
+    def rating(self):
+        """Возвращает округлённую вниз среднюю оценку произведения."""
+        if not self.review_count:
+            return None
+        return self.score_sum // self.review_count
+
+    @property
+    def histogram(self):
+        """Возвращает число отзывов с каждой оценкой."""
+        return {
+            str(score): getattr(self, self.histogram_field(score))
+            for score in self.SCORES
+        }
+
+    class Meta:
+        """Метакласс модели Title."""
+
+        indexes = (
+            models.Index(fields=('year',), name='title_year_idx'),
+            models.Index(
+                fields=('category', 'year'),
+                name='title_category_year_idx'
+            ),
+        )
+
 
 class Review(models.Model):
     """
@@ -141,6 +277,10 @@ class Review(models.Model):
     author   -- Автор отзыва.
     score    -- Оценка произведения автором отзыва.
     pub_date -- Дата публикации отзыва.
+    modified -- Время изменения отзыва или его комментариев.
+
+    Методы:
+    from_db -- Запоминает оценку, загруженную из базы данных.
 
     Субклассы:
     Meta -- Метакласс модели Review.
@@ -157,6 +297,17 @@ class Review(models.Model):
     )
     score = models.IntegerField(validators=[validate_one_to_ten])
     pub_date = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает оценку, загруженную из базы данных."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
 
     class Meta:
         """Метакласс модели Review."""
@@ -168,6 +319,12 @@ class Review(models.Model):
                 name='unique_review'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        )
 
 
 class Comment(models.Model):
@@ -178,6 +335,7 @@ class Comment(models.Model):
     text      -- Текст комментария.
     author    -- Автор комментария.
     pub_date  -- Дата публикации комментария.
+    modified  -- Время изменения комментария.
 
     Субклассы:
     Meta -- Метакласс модели Comment.
@@ -193,8 +351,108 @@ class Comment(models.Model):
         on_delete=models.CASCADE
     )
     pub_date = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         """Метакласс модели Comment."""
 
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Строка рейтинговой таблицы произведений.
+
+    У каждого произведения есть строка общего рейтинга,
+    строка рейтинга его категории и по строке на каждый жанр,
+    чтобы любой рейтинг читался по одному индексу.
+
+    title        -- Произведение.
+    scope        -- Вид рейтинга: общий, по категории или по жанру.
+    scope_id     -- Id категории или жанра, 0 для общего рейтинга.
+    score_sum    -- Сумма оценок всех отзывов на произведение.
+    review_count -- Количество отзывов на произведение.
+    average      -- Средняя оценка произведения.
+
+    Субклассы:
+    Meta -- Метакласс модели LeaderboardEntry.
+    """
+
+    ALL = 'all'
+    CATEGORY = 'category'
+    GENRE = 'genre'
+    SCOPES = [
+        (ALL, 'All'),
+        (CATEGORY, 'Category'),
+        (GENRE, 'Genre'),
+    ]
+
+    title = models.ForeignKey(
+        to=Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries'
+    )
+    scope = models.CharField(max_length=8, choices=SCOPES)
+    scope_id = models.PositiveBigIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    average = models.FloatField(default=0)
+
+    class Meta:
+        """Метакласс модели LeaderboardEntry."""
+
+        verbose_name = 'Строка рейтинга'
+        verbose_name_plural = 'Рейтинг произведений'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'scope', 'scope_id'),
+                name='unique_leaderboard_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('scope', 'scope_id', '-average', '-review_count'),
+                name='leaderboard_rank_idx'
+            ),
+        )
+
+
+class ImportDigest(models.Model):
+    """
+    Хэш строки CSV, загруженной командой import_csv.
+
+    По хэшу повторный импорт пропускает строки, которые
+    не изменились с прошлой загрузки.
+
+    table_name -- Таблица, в которую загружена строка.
+    row_id     -- Id загруженной строки.
+    digest     -- md5 значений строки CSV.
+
+    Субклассы:
+    Meta -- Метакласс модели ImportDigest.
+    """
+
+    table_name = models.CharField(max_length=64)
+    row_id = models.BigIntegerField()
+    digest = models.CharField(max_length=32)
+
+    class Meta:
+        """Метакласс модели ImportDigest."""
+
+        verbose_name = 'Хэш импортированной строки'
+        verbose_name_plural = 'Хэши импортированных строк'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('table_name', 'row_id'),
+                name='unique_import_digest'
+            ),
+        )
@@ -0,0 +1,86 @@
+"""
+Хранимый рейтинг произведений.
+
+apply_review_change -- Учитывает изменение одной оценки
+                       в счётчиках произведения.
+refresh_rating      -- Пересчитывает рейтинг одного произведения.
+rebuild_ratings     -- Пересчитывает рейтинг всех произведений.
+"""
+
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Review, Title
+
+
+def apply_review_change(title_id, old_score=None, new_score=None):
+    """
+    Учитывает изменение одной оценки в счётчиках произведения.
+
+    old_score -- Оценка до изменения, None для нового отзыва.
+    new_score -- Оценка после изменения, None для удалённого отзыва.
+
+    Сумма оценок, число отзывов, гистограмма оценок и время
+    изменения произведения (по нему считаются ETag отзывов)
+    обновляются одним UPDATE.
+    """
+    histogram = Counter()
+    if old_score is not None:
+        histogram[old_score] -= 1
+    if new_score is not None:
+        histogram[new_score] += 1
+    changes = {
+        'score_sum': F('score_sum') + (new_score or 0) - (old_score or 0),
+        'review_count': (F('review_count') + (new_score is not None)
+                         - (old_score is not None)),
+        'modified': timezone.now(),
+    }
+    for score, delta in histogram.items():
+        if delta:
+            field = Title.histogram_field(score)
+            changes[field] = F(field) + delta
+    return Title.objects.filter(pk=title_id).update(**changes)
+
+
+def _stats_subquery(aggregate):
+    """Возвращает подзапрос с агрегатом по отзывам произведения."""
+    return Coalesce(
+        Subquery(
+            Review.objects.filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+            .annotate(value=aggregate)
+            .values('value')
+        ),
+        0
+    )
+
+
+def _rating_fields():
+    """Возвращает выражения пересчёта рейтинга для update."""
+    fields = {
+        'score_sum': _stats_subquery(Sum('score')),
+        'review_count': _stats_subquery(Count('id')),
+    }
+    for score in Title.SCORES:
+        fields[Title.histogram_field(score)] = _stats_subquery(
+            Count('id', filter=Q(score=score))
+        )
+    return fields
+
+
+def refresh_rating(title_id):
+    """Пересчитывает рейтинг одного произведения."""
+    return Title.objects.filter(pk=title_id).update(
+        modified=timezone.now(), **_rating_fields()
+    )
+
+
+def rebuild_ratings(queryset=None):
+    """Пересчитывает рейтинг всех произведений одним запросом."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.update(**_rating_fields())
@@ -0,0 +1,91 @@
+"""
+Полнотекстовый поиск произведений.
+
+На PostgreSQL поиск идёт по хранимому столбцу search_vector
+(генерируемый tsvector с GIN-индексом, см. миграцию 0011).
+На SQLite те же правила разбора слов выполняет функция
+yamdb_search_rank, поэтому набор найденных произведений совпадает.
+Порядок совпадает не всегда: ts_rank учитывает, сколько раз слово
+встречается в тексте, и его длину, а yamdb_search_rank -- только
+вес поля (название или описание). Совпадение в названии выше
+совпадения только в описании на обеих базах, а порядок внутри
+такой группы на PostgreSQL может отличаться.
+
+tokenize                  -- Разбивает текст на слова в нижнем регистре.
+search_rank               -- Считает релевантность произведения запросу.
+register_sqlite_functions -- Регистрирует функцию поиска в SQLite.
+search_titles             -- Отбирает и сортирует произведения по запросу.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'simple'
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Разбивает текст на слова в нижнем регистре."""
+    return WORD_RE.findall((text or '').lower())
+
+
+def search_rank(name, description, query):
+    """
+    Считает релевантность произведения запросу.
+
+    Произведение найдено, если каждое слово запроса есть в названии
+    или описании. Совпадение в названии весит больше, чем в описании.
+    """
+    name_words = set(tokenize(name))
+    description_words = set(tokenize(description))
+    rank = 0.0
+    for word in set(tokenize(query)):
+        if word in name_words:
+            rank += NAME_WEIGHT
+        elif word in description_words:
+            rank += DESCRIPTION_WEIGHT
+        else:
+            return 0.0
+    return rank
+
+
+def register_sqlite_functions(connection):
+    """Регистрирует функцию поиска в SQLite."""
+    connection.connection.create_function(
+        'yamdb_search_rank', 3, search_rank, deterministic=True
+    )
+
+
+def search_titles(queryset, query):
+    """Отбирает и сортирует произведения по запросу."""
+    words = tokenize(query)
+    if not words:
+        return queryset.none()
+    query = ' '.join(words)
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        vector = '{}.search_vector'.format(
+            connection.ops.quote_name(queryset.model._meta.db_table)
+        )
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        queryset = queryset.filter(
+            RawSQL(f'{vector} @@ {tsquery}', (query,),
+                   output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank({vector}, {tsquery})', (query,),
+                               output_field=FloatField())
+        )
+    else:
+        queryset = queryset.annotate(
+            search_rank=Func(
+                F('name'), F('description'), Value(query),
+                function='yamdb_search_rank',
+                output_field=FloatField()
+            )
+        ).filter(search_rank__gt=0)
+    return queryset.order_by('-search_rank', 'id')
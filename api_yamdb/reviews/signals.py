@@ -0,0 +1,129 @@
+"""
+Сигналы приложения reviews.
+
+update_rating_on_save            -- Учитывает новый или изменённый отзыв
+                                    в рейтинге.
+update_rating_on_delete          -- Исключает удалённый отзыв из рейтинга.
+touch_review                     -- Обновляет время изменения отзыва
+                                    при изменении его комментариев.
+sync_leaderboard_on_title_save   -- Пересобирает строки рейтинга
+                                    нового или изменённого произведения.
+sync_leaderboard_on_genre_change -- Пересобирает строки рейтинга
+                                    при смене жанров произведения.
+drop_leaderboard_scope           -- Удаляет рейтинг удалённой
+                                    категории или жанра.
+setup_sqlite_search              -- Подключает функцию поиска
+                                    к соединению SQLite.
+"""
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .leaderboard import (apply_leaderboard_delta, drop_scope,
+                          sync_title_leaderboard)
+from .models import Categories, Comment, Genre, LeaderboardEntry, Review, Title
+from .ratings import apply_review_change, refresh_rating
+from .search import register_sqlite_functions
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Учитывает новый или изменённый отзыв в рейтинге произведения.
+
+    Обновление счётчиков заодно проверяет, что произведение
+    существует: для нового отзыва на отсутствующее произведение
+    поднимается Title.DoesNotExist, и транзакция создания
+    отзыва откатывается.
+    """
+    if raw:
+        return
+    loaded_score = getattr(instance, '_loaded_score', None)
+    new_score = int(instance.score)
+    instance._loaded_score = new_score
+    if not created and loaded_score is None:
+        refresh_rating(instance.title_id)
+        sync_title_leaderboard(instance.title_id)
+        return
+    old_score = None if created else loaded_score
+    updated = apply_review_change(instance.title_id, old_score, new_score)
+    if created and not updated:
+        raise Title.DoesNotExist(
+            f'Произведение {instance.title_id} не найдено.'
+        )
+    score_delta = new_score - (old_score or 0)
+    if score_delta or created:
+        apply_leaderboard_delta(instance.title_id, score_delta, int(created))
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает удалённый отзыв из рейтинга произведения."""
+    apply_review_change(instance.title_id, old_score=instance.score)
+    apply_leaderboard_delta(instance.title_id, -instance.score, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_review(sender, instance, raw=False, created=False, **kwargs):
+    """
+    Обновляет время изменения отзыва при изменении его комментариев.
+
+    Произведение не трогается: комментарии не входят в его ответ,
+    а список отзывов с комментариями сверяется со временем
+    изменения отзывов.
+
+    Обновление отзыва заодно проверяет, что он существует (и, если
+    у комментария уже есть отзыв с произведением, что отзыв к этому
+    произведению): для нового комментария к отсутствующему отзыву
+    поднимается Review.DoesNotExist, и транзакция откатывается.
+    """
+    if raw:
+        return
+    reviews = Review.objects.filter(pk=instance.review_id)
+    if Comment.review.is_cached(instance):
+        reviews = reviews.filter(title_id=instance.review.title_id)
+    if not reviews.update(modified=timezone.now()) and created:
+        raise Review.DoesNotExist(f'Отзыв {instance.review_id} не найден.')
+
+
+@receiver(post_save, sender=Title)
+def sync_leaderboard_on_title_save(sender, instance, created, raw=False,
+                                   **kwargs):
+    """Пересобирает строки рейтинга нового или изменённого произведения."""
+    if raw:
+        return
+    sync_title_leaderboard(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def sync_leaderboard_on_genre_change(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    """Пересобирает строки рейтинга при смене жанров произведения."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        sync_title_leaderboard(instance.pk)
+    elif action == 'post_clear':
+        drop_scope(LeaderboardEntry.GENRE, instance.pk)
+    else:
+        for title_id in pk_set:
+            sync_title_leaderboard(title_id)
+
+
+@receiver(post_delete, sender=Categories)
+@receiver(post_delete, sender=Genre)
+def drop_leaderboard_scope(sender, instance, **kwargs):
+    """Удаляет рейтинг удалённой категории или жанра."""
+    scope = (LeaderboardEntry.CATEGORY if sender is Categories
+             else LeaderboardEntry.GENRE)
+    drop_scope(scope, instance.pk)
+
+
+@receiver(connection_created)
+def setup_sqlite_search(sender, connection, **kwargs):
+    """Подключает функцию поиска к соединению SQLite."""
+    if connection.vendor == 'sqlite':
+        register_sqlite_functions(connection)
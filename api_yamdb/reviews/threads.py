@@ -0,0 +1,96 @@
+"""
+Последние комментарии к отзывам одним запросом.
+
+На PostgreSQL и SQLite 3.25+ номер комментария внутри отзыва
+считает оконная функция ROW_NUMBER() по индексу
+comment_review_pub_date_idx. На старом SQLite без оконных функций
+тот же номер даёт коррелированный подзапрос.
+
+comment_count_subquery -- Возвращает подзапрос с числом комментариев
+                          отзыва.
+latest_comments        -- Возвращает последние комментарии отзывов.
+"""
+
+from collections import defaultdict
+
+from django.db import connections, router
+from django.db.models import (Count, F, IntegerField, OuterRef, Q, Subquery,
+                              Window)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import Comment
+
+
+def comment_count_subquery():
+    """Возвращает подзапрос с числом комментариев отзыва."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(review=OuterRef('pk'))
+            .order_by()
+            .values('review')
+            .annotate(value=Count('id'))
+            .values('value'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _ranked_ids(review_ids, limit):
+    """Возвращает подзапрос с id первых limit комментариев отзывов."""
+    ranked = Comment.objects.filter(review_id__in=review_ids).annotate(
+        comment_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('review_id')],
+            order_by=[F('pub_date').desc(), F('id').desc()]
+        )
+    ).order_by().values('id', 'comment_rank')
+    sql, params = ranked.query.sql_with_params()
+    return RawSQL(
+        f'SELECT id FROM ({sql}) ranked WHERE comment_rank <= %s',
+        (*params, limit)
+    )
+
+
+def _newer_count_subquery():
+    """Возвращает подзапрос с числом более новых комментариев отзыва."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(
+                Q(pub_date__gt=OuterRef('pub_date'))
+                | Q(pub_date=OuterRef('pub_date'), id__gt=OuterRef('id')),
+                review=OuterRef('review')
+            )
+            .order_by()
+            .values('review')
+            .annotate(value=Count('id'))
+            .values('value'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def latest_comments(review_ids, limit):
+    """
+    Возвращает последние комментарии отзывов.
+
+    Результат -- словарь id отзыва: список не более limit комментариев
+    от новых к старым, с авторами. Выполняется один запрос.
+    """
+    review_ids = list(review_ids)
+    if not review_ids or limit <= 0:
+        return {}
+    queryset = Comment.objects.select_related('author')
+    connection = connections[router.db_for_read(Comment)]
+    if connection.features.supports_over_clause:
+        queryset = queryset.filter(id__in=_ranked_ids(review_ids, limit))
+    else:
+        queryset = queryset.filter(review_id__in=review_ids).annotate(
+            newer_count=_newer_count_subquery()
+        ).filter(newer_count__lt=limit)
+    comments = defaultdict(list)
+    for comment in queryset.order_by('review_id', '-pub_date', '-id'):
+        comments[comment.review_id].append(comment)
+    return comments
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -16,3 +16,21 @@ class UserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(User, UserAdmin)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipient',
+        'subject',
+        'created',
+        'next_attempt',
+        'attempts',
+        'sent'
+    )
+    list_filter = ('sent',)
+    search_fields = ('recipient',)
+    exclude = ('body',)
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1,93 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from users.outbox import purge_emails, queue_stats, send_batch
+
+# Как часто воркер удаляет старые письма, в секундах.
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    """
+    Отправка писем из очереди
+    """
+
+    help = (
+        'Отправляет письма из очереди пачками через одно подключение '
+        'к почтовому серверу и ждёт новые. С --once выходит, когда '
+        'отправлять нечего, с --stats только показывает состояние очереди, '
+        'с --purge только удаляет письма старше EMAIL_QUEUE_RETENTION дней'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить всё, что пора, и выйти'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Показать глубину очереди и задержку отправки'
+        )
+        parser.add_argument(
+            '--purge', action='store_true',
+            help='Удалить старые отправленные и неотправленные письма'
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        if options['stats']:
+            self.write_stats()
+            return
+        if options['purge']:
+            self.purge()
+            return
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        purged = None
+        while not self.stopping:
+            if purged is None or time.monotonic() - purged > PURGE_INTERVAL:
+                self.purge()
+                purged = time.monotonic()
+            sent, postponed = send_batch(options['batch_size'])
+            if sent or postponed:
+                self.stdout.write(f'Отправлено {sent}, отложено {postponed}')
+                self.write_stats()
+                continue
+            if options['once']:
+                break
+            time.sleep(settings.EMAIL_QUEUE_POLL_INTERVAL)
+
+    def stop(self, signum, frame):
+        """Завершает работу после текущей пачки."""
+        self.stopping = True
+
+    def purge(self):
+        """Удаляет старые письма и выводит их число."""
+        deleted = purge_emails()
+        if deleted:
+            self.stdout.write(f'Удалено старых писем: {deleted}')
+
+    def write_stats(self):
+        """Выводит состояние очереди."""
+        stats = queue_stats()
+        oldest = (
+            f'{stats.oldest_age.total_seconds():.0f} с'
+            if stats.oldest_age is not None else '-'
+        )
+        latency = (
+            f'{stats.average_latency.total_seconds():.1f} с, '
+            f'наибольшая {stats.max_latency.total_seconds():.1f} с'
+            if stats.average_latency is not None else '-'
+        )
+        self.stdout.write(
+            f'В очереди {stats.pending} (пора отправить {stats.due}), '
+            f'не отправлено {stats.failed}, самое старое ждёт {oldest}, '
+            f'задержка отправки за час {latency}'
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-18 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text='Токены с ролями прежней версии не принимаются', verbose_name='Версия токенов'),
+        ),
+    ]
@@ -1,7 +1,13 @@
-"""Импорт и переопределение модели AbstractUser."""
+"""
+Импорт и переопределение модели AbstractUser.
+
+User          -- Переопределенный класс пользователя.
+OutgoingEmail -- Письмо в очереди на отправку.
+"""
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from users.validators import validate_email_address, validate_username
 
 
@@ -17,6 +23,7 @@ class User(AbstractUser):
     last_name - фамилия пользователя.
     bio - биография пользователя.
     role - роль пользователя (администратор, модератор, пользователь)
+    token_version - версия токенов с ролями, растёт при смене роли.
 
     """
 
@@ -28,6 +35,8 @@ class User(AbstractUser):
         (MODERATOR, 'Moderator'),
         (USER, 'User'),
     ]
+    # Поля, при изменении которых выданные токены с ролями отзываются.
+    CLAIM_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
 
     username = models.CharField(
         max_length=150,
@@ -71,11 +80,38 @@ class User(AbstractUser):
         default=USER,
         max_length=15
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        help_text='Токены с ролями прежней версии не принимаются',
+        default=0
+    )
 
     def __str__(self):
         """Возвращает никнейм пользователя."""
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные из базы права пользователя."""
+        user = super().from_db(db, field_names, values)
+        user._loaded_claims = user._claims()
+        return user
+
+    def _claims(self):
+        return tuple(self.__dict__.get(name) for name in self.CLAIM_FIELDS)
+
+    def save(self, *args, **kwargs):
+        """Сохраняет пользователя, при смене прав отзывает токены."""
+        loaded = getattr(self, '_loaded_claims', None)
+        if loaded is not None and loaded != self._claims():
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'token_version'
+                }
+        super().save(*args, **kwargs)
+        self._loaded_claims = self._claims()
+
     @property
     def is_moderator(self):
         """Присвоение пользователю роли Модератор."""
@@ -91,3 +127,64 @@ class User(AbstractUser):
 
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+
+    Письма ставятся в очередь во время запроса, а отправляет их
+    команда send_queued_mail. Письмо в очереди, пока у него есть
+    время следующей попытки: после отправки или последней
+    неудачной попытки оно обнуляется.
+
+    subject      -- Тема письма.
+    body         -- Текст письма.
+    from_email   -- Адрес отправителя.
+    recipient    -- Адрес получателя.
+    created      -- Время постановки в очередь.
+    next_attempt -- Время следующей попытки отправки.
+    attempts     -- Число неудачных попыток.
+    sent         -- Время отправки.
+    last_error   -- Ошибка последней неудачной попытки.
+
+    Субклассы:
+    Meta -- Метакласс модели OutgoingEmail.
+    """
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(max_length=254, verbose_name='Отправитель')
+    recipient = models.EmailField(verbose_name='Получатель')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлено в очередь'
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Следующая попытка'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Неудачных попыток'
+    )
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    def __str__(self):
+        """Возвращает получателя и тему письма."""
+        return f'{self.recipient}: {self.subject}'
+
+    class Meta:
+        """Метакласс модели OutgoingEmail."""
+
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt', 'id')
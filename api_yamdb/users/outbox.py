@@ -0,0 +1,208 @@
+"""
+Очередь исходящих писем.
+
+Во время запроса письмо только сохраняется в OutgoingEmail,
+а отправляет его команда send_queued_mail: пачками по
+EMAIL_QUEUE_BATCH_SIZE писем через одно подключение к почтовому
+серверу. Неудачная попытка откладывает письмо с удваивающейся
+задержкой, после EMAIL_QUEUE_MAX_ATTEMPTS попыток письмо
+снимается с очереди с последней ошибкой в last_error.
+
+В письмах лежат коды подтверждения, поэтому текст письма стирается,
+как только оно отправлено или снято с очереди, а сами строки старше
+EMAIL_QUEUE_RETENTION дней удаляет purge_emails.
+
+Пачка забирается в короткой транзакции: строки выбираются через
+SELECT ... FOR UPDATE SKIP LOCKED, и next_attempt сдвигается на
+EMAIL_QUEUE_LEASE секунд вперёд, так что другие воркеры их не
+возьмут. Письма отправляются уже вне транзакции, а результат каждого
+обработанного письма записывается, даже если отправка пачки
+оборвалась. Письма, до которых дело не дошло, вернутся в очередь,
+когда срок аренды истечёт.
+
+QueueStats    -- Состояние очереди.
+enqueue_email -- Ставит письмо в очередь.
+send_batch    -- Отправляет пачку писем, время которых пришло.
+purge_emails  -- Удаляет старые отправленные и неотправленные письма.
+queue_stats   -- Возвращает состояние очереди.
+"""
+
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+UPDATE_FIELDS = ('body', 'next_attempt', 'attempts', 'sent', 'last_error')
+
+QueueStats = namedtuple(
+    'QueueStats',
+    ('pending', 'due', 'failed', 'oldest_age', 'average_latency',
+     'max_latency')
+)
+
+
+def enqueue_email(subject, body, recipient, from_email=None):
+    """Ставит письмо в очередь и возвращает его."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_ADMIN,
+        recipient=recipient
+    )
+
+
+def _postpone(email, error, now):
+    """Откладывает письмо после неудачной попытки."""
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        email.body = ''
+        email.next_attempt = None
+        logger.error(
+            'Письмо %s для %s не отправлено после %s попыток: %s',
+            email.pk, email.recipient, email.attempts, email.last_error
+        )
+        return
+    delay = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (email.attempts - 1)
+    email.next_attempt = now + timedelta(seconds=delay)
+    logger.warning(
+        'Письмо %s для %s отложено на %s с: %s',
+        email.pk, email.recipient, delay, email.last_error
+    )
+
+
+def _claim(limit, now):
+    """Забирает пачку писем, время которых пришло."""
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt__lte=now)
+            .order_by('next_attempt', 'id')[:limit]
+        )
+        if emails:
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(
+                next_attempt=now + timedelta(
+                    seconds=settings.EMAIL_QUEUE_LEASE
+                )
+            )
+    return emails
+
+
+def _deliver(connection, emails, now, done):
+    """
+    Отправляет письма через открытое подключение.
+
+    Любая ошибка при сборке или отправке письма (не только сетевая,
+    но и, например, BadHeaderError) откладывает это письмо
+    с увеличением числа попыток, и пачка идёт дальше.
+    """
+    for email in emails:
+        try:
+            EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=[email.recipient],
+                connection=connection
+            ).send()
+        except Exception as error:
+            _postpone(email, error, now)
+        else:
+            email.sent = timezone.now()
+            email.body = ''
+            email.next_attempt = None
+            email.last_error = ''
+        done.append(email)
+
+
+def send_batch(limit=None):
+    """
+    Отправляет пачку писем, время которых пришло.
+
+    Все письма пачки идут через одно подключение. Если подключиться
+    не удалось, откладывается вся пачка. Результаты обработанных
+    писем записываются и тогда, когда отправка оборвалась
+    исключением. Возвращает пару (отправлено, отложено).
+    """
+    now = timezone.now()
+    emails = _claim(limit or settings.EMAIL_QUEUE_BATCH_SIZE, now)
+    if not emails:
+        return 0, 0
+    done = []
+    try:
+        connection = get_connection()
+        try:
+            connection.open()
+        except OSError as error:
+            for email in emails:
+                _postpone(email, error, now)
+                done.append(email)
+        else:
+            try:
+                _deliver(connection, emails, now, done)
+            finally:
+                connection.close()
+    finally:
+        OutgoingEmail.objects.bulk_update(done, UPDATE_FIELDS)
+    sent = sum(email.sent is not None for email in done)
+    return sent, len(done) - sent
+
+
+def purge_emails(now=None):
+    """
+    Удаляет старые отправленные и неотправленные письма.
+
+    Удаляются письма, отправленные раньше EMAIL_QUEUE_RETENTION дней
+    назад, и снятые с очереди без отправки, созданные раньше этого
+    срока. Возвращает число удалённых писем.
+    """
+    now = now or timezone.now()
+    border = now - timedelta(days=settings.EMAIL_QUEUE_RETENTION)
+    deleted, _ = OutgoingEmail.objects.filter(
+        Q(sent__lt=border)
+        | Q(sent__isnull=True, next_attempt__isnull=True, created__lt=border)
+    ).delete()
+    return deleted
+
+
+def queue_stats(window=timedelta(hours=1)):
+    """
+    Возвращает состояние очереди.
+
+    pending -- писем в очереди, due -- из них пора отправлять,
+    failed -- снятых с очереди без отправки. oldest_age -- сколько
+    ждёт самое старое письмо в очереди, average_latency и
+    max_latency -- задержка отправки писем за последний window.
+    """
+    now = timezone.now()
+    queue = OutgoingEmail.objects.aggregate(
+        pending=Count('id', filter=Q(next_attempt__isnull=False)),
+        due=Count('id', filter=Q(next_attempt__lte=now)),
+        failed=Count(
+            'id', filter=Q(next_attempt__isnull=True, sent__isnull=True)
+        ),
+        oldest=Min('created', filter=Q(next_attempt__isnull=False)),
+    )
+    latency = OutgoingEmail.objects.filter(sent__gte=now - window).aggregate(
+        average=Avg(F('sent') - F('created')),
+        maximum=Max(F('sent') - F('created')),
+    )
+    return QueueStats(
+        pending=queue['pending'],
+        due=queue['due'],
+        failed=queue['failed'],
+        oldest_age=now - queue['oldest'] if queue['oldest'] else None,
+        average_latency=latency['average'],
+        max_latency=latency['maximum'],
+    )